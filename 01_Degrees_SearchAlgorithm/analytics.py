@@ -0,0 +1,221 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import degrees
+
+# Adjacency shared with forked workers: person -> movie indices and
+# movie -> person positions, built by build_adjacency
+adjacency = None
+
+
+def build_adjacency():
+    """
+    Returns (person_movies, movie_people) lists of integer lists for the
+    data loaded into degrees, numbering people by degrees.person_positions.
+    """
+    graph = degrees.graph
+    if graph is not None:
+        person_movies = [list(graph.movies_for(p))
+                         for p in range(len(graph.person_ids))]
+        movie_people = [list(graph.stars_for(m))
+                        for m in range(len(graph.movie_ids))]
+        return person_movies, movie_people
+
+    count, position, _, _, _ = degrees.person_positions()
+    movie_index = {movie_id: i for i, movie_id in enumerate(degrees.movies)}
+    person_movies = [[] for _ in range(count)]
+    movie_people = [[] for _ in range(len(movie_index))]
+    for movie_id, movie in degrees.movies.items():
+        m = movie_index[movie_id]
+        for person_id in movie["stars"]:
+            p = position(person_id)
+            person_movies[p].append(m)
+            movie_people[m].append(p)
+    return person_movies, movie_people
+
+
+def bit_parallel_bfs(sources, person_movies, movie_people):
+    """
+    Runs one breadth-first search per source at the same time, with
+    source j owning bit j of an integer bitset kept for every person.
+
+    Each layer ORs the frontier bits of a movie's cast into one mask and
+    spreads that mask back over the cast, so the cost per layer is one
+    pass over the touched person-movie edges for the whole batch.
+
+    Returns (histogram, eccentricities): histogram counts ordered
+    (source, person) pairs by degrees of separation and eccentricities
+    gives each source's greatest distance to anyone it reaches.
+    """
+    visited = {}
+    frontier = {}
+    for j, source in enumerate(sources):
+        visited[source] = visited.get(source, 0) | (1 << j)
+        frontier[source] = frontier.get(source, 0) | (1 << j)
+
+    histogram = Counter()
+    eccentricities = [0] * len(sources)
+    depth = 0
+    while frontier:
+        depth += 1
+
+        masks = {}
+        for person, bits in frontier.items():
+            for movie in person_movies[person]:
+                masks[movie] = masks.get(movie, 0) | bits
+
+        reached = {}
+        for movie, bits in masks.items():
+            for person in movie_people[movie]:
+                reached[person] = reached.get(person, 0) | bits
+
+        frontier = {}
+        layer = 0
+        for person, bits in reached.items():
+            new = bits & ~visited.get(person, 0)
+            if new:
+                visited[person] = visited.get(person, 0) | new
+                frontier[person] = new
+                layer |= new
+                histogram[depth] += new.bit_count()
+
+        while layer:
+            low = layer & -layer
+            eccentricities[low.bit_length() - 1] = depth
+            layer ^= low
+
+    return histogram, eccentricities
+
+
+def _run_batch(sources):
+    """Worker entry point: one bit-parallel BFS batch."""
+    person_movies, movie_people = adjacency
+    histogram, eccentricities = bit_parallel_bfs(
+        sources, person_movies, movie_people
+    )
+    return histogram, list(zip(sources, eccentricities))
+
+
+def separation_statistics(sources, width=2048, workers=1):
+    """
+    Returns (histogram, eccentricities) over all sources, running them
+    in batches of width bits, optionally across forked processes.
+
+    Python integers are not machine words: the cost of a layer is the
+    dict and OR work per touched edge, nearly the same for 64 bits as
+    for thousands, so wide batches are far cheaper per source.
+    eccentricities maps each source position to its eccentricity.
+    """
+    global adjacency
+    if adjacency is None:
+        adjacency = build_adjacency()
+
+    batches = [sources[i:i + width] for i in range(0, len(sources), width)]
+    histogram = Counter()
+    eccentricities = {}
+
+    def merge(results):
+        for batch_histogram, batch_eccentricities in results:
+            histogram.update(batch_histogram)
+            eccentricities.update(batch_eccentricities)
+
+    if workers == 1 or len(batches) <= 1:
+        merge(map(_run_batch, batches))
+    else:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            merge(pool.imap_unordered(_run_batch, batches))
+    return histogram, eccentricities
+
+
+def component_sizes(person_movies, movie_people):
+    """
+    Returns the sizes of the connected components of the co-star
+    graph, largest first. People without movies are their own component.
+    """
+    seen = bytearray(len(person_movies))
+    seen_movies = bytearray(len(movie_people))
+    sizes = []
+    for start in range(len(person_movies)):
+        if seen[start]:
+            continue
+        seen[start] = 1
+        size = 0
+        stack = [start]
+        while stack:
+            person = stack.pop()
+            size += 1
+            for movie in person_movies[person]:
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for other in movie_people[movie]:
+                    if not seen[other]:
+                        seen[other] = 1
+                        stack.append(other)
+        sizes.append(size)
+    sizes.sort(reverse=True)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python analytics.py [directory] [--sample N] [--width W] "
+              "[--workers N]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--sample", type=int,
+                        help="use this many random sources instead of everyone")
+    parser.add_argument("--width", type=int, default=2048,
+                        help="sources per bit-parallel BFS; the per-edge "
+                             "work barely grows with width, so wider is "
+                             "faster per source at the cost of memory "
+                             "(width / 8 bytes per reached person)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the integer-indexed CSR graph")
+    args = parser.parse_args()
+
+    global adjacency
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact)
+    adjacency = build_adjacency()
+    print("Data loaded.", file=sys.stderr)
+    person_movies, movie_people = adjacency
+
+    sizes = component_sizes(person_movies, movie_people)
+    print(f"People: {len(person_movies)}  Movies: {len(movie_people)}")
+    print(f"Connected components: {len(sizes)}  "
+          f"(largest {sizes[0] if sizes else 0}, "
+          f"isolated {sizes.count(1)})")
+    for size, number in sorted(Counter(sizes).items(), reverse=True)[:10]:
+        print(f"    size {size}: {number}")
+
+    sources = list(range(len(person_movies)))
+    if args.sample is not None and args.sample < len(sources):
+        sources = sorted(random.sample(sources, args.sample))
+    start = time.perf_counter()
+    histogram, eccentricities = separation_statistics(
+        sources, args.width, args.workers
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"Degrees of separation from {len(sources)} sources "
+          f"({elapsed:.1f}s):")
+    for depth in sorted(histogram):
+        print(f"    {depth}: {histogram[depth]}")
+    # People without co-stars have eccentricity 0 and are left out
+    values = [value for value in eccentricities.values() if value]
+    if values:
+        print(f"Eccentricity: radius {min(values)}, diameter {max(values)}")
+        for depth, number in sorted(Counter(values).items()):
+            print(f"    {depth}: {number}")
+
+
+if __name__ == "__main__":
+    main()
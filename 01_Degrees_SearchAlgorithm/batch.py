@@ -0,0 +1,117 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import degrees
+
+
+def read_pairs(filename):
+    """
+    Reads (source, target) pairs of names or person ids from a CSV file
+    with two columns, skipping blank lines and a "source,target" header.
+    """
+    pairs = []
+    with open(filename, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            header = [cell.strip().lower() for cell in row[:2]]
+            if not pairs and header == ["source", "target"]:
+                continue
+            pairs.append((row[0].strip(), row[1].strip()))
+    return pairs
+
+
+def group_by_source(pairs):
+    """
+    Resolves pairs to person ids and groups targets by source.
+
+    Returns (groups, errors) where groups maps each source person_id to
+    its list of target person_ids and errors lists unresolved pairs.
+    """
+    groups = {}
+    errors = []
+    for source, target in pairs:
+        try:
+            source_id = degrees.resolve_person(source)
+            target_id = degrees.resolve_person(target)
+        except LookupError as e:
+            errors.append({"source": source, "target": target,
+                           "error": str(e)})
+            continue
+        groups.setdefault(source_id, []).append(target_id)
+    return groups, errors
+
+
+def _solve(task):
+    """Worker entry point: answers every target of one source."""
+    source, targets = task
+    return source, degrees.paths_from_source(source, targets)
+
+
+def batch_paths(groups, workers=None):
+    """
+    Yields (source, target, path) for every grouped pair, one BFS per
+    source, spreading sources across forked worker processes.
+
+    Workers inherit the data loaded into degrees through fork, so the
+    graph is shared read-only rather than pickled to each process.
+    """
+    tasks = list(groups.items())
+    if workers == 1 or len(tasks) <= 1:
+        for source, paths in map(_solve, tasks):
+            for target in groups[source]:
+                yield source, target, paths[target]
+        return
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        for source, paths in pool.imap_unordered(_solve, tasks, chunksize=4):
+            for target in groups[source]:
+                yield source, target, paths[target]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python batch.py pairs.csv [directory] [--workers N]"
+    )
+    parser.add_argument("pairs", help="CSV file of source,target names or ids")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the integer-indexed CSR graph")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact)
+    print("Data loaded.", file=sys.stderr)
+
+    pairs = read_pairs(args.pairs)
+    start = time.perf_counter()
+    groups, errors = group_by_source(pairs)
+    for error in errors:
+        print(json.dumps(error, ensure_ascii=False))
+
+    count = 0
+    for source, target, path in batch_paths(groups, args.workers):
+        print(json.dumps({
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path
+        }))
+        count += 1
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"{count} pairs from {len(groups)} sources in {elapsed:.3f}s "
+          f"({rate:.1f} pairs/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
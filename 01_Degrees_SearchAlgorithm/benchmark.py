@@ -0,0 +1,128 @@
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+import time
+
+SEARCHES = ("bfs", "bidirectional", "landmarks")
+MODES = ("dict", "compact")
+
+
+def peak_rss_mb():
+    """Returns this process's peak resident set size in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run(directory, compact, searches, queries, seed):
+    """
+    Loads directory and times neighbor expansion and every search in
+    searches over the same random pairs. Meant to run in a fresh process
+    so that peak memory reflects this configuration alone.
+    """
+    import degrees
+    from server import percentile
+
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact)
+    results = {"load_s": time.perf_counter() - start}
+    # A memory-mapped snapshot is barely touched by loading, so the
+    # peak is sampled again once the queries have paged it in
+    results["load_rss_mb"] = peak_rss_mb()
+
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids))
+             for _ in range(queries)]
+
+    timings = []
+    for source, _ in pairs:
+        start = time.perf_counter()
+        degrees.neighbors_for_person(source)
+        timings.append((time.perf_counter() - start) * 1000)
+    results["neighbors"] = summarize(timings, percentile)
+
+    functions = {
+        "bfs": degrees.shortest_path,
+        "bidirectional": degrees.bidirectional_shortest_path,
+        "landmarks": degrees.landmark_shortest_path,
+    }
+    for search in searches:
+        if search == "landmarks":
+            start = time.perf_counter()
+            degrees.get_landmark_index()
+            results["landmarks_index_s"] = time.perf_counter() - start
+        timings, explored = [], []
+        for source, target in pairs:
+            start = time.perf_counter()
+            functions[search](source, target)
+            timings.append((time.perf_counter() - start) * 1000)
+            explored.append(degrees.search_stats["explored"])
+        results[search] = summarize(timings, percentile)
+        results[search]["explored_mean"] = sum(explored) / len(explored)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def summarize(timings, percentile):
+    """Returns mean and percentile latencies in milliseconds."""
+    timings = sorted(timings)
+    summary = {"mean_ms": sum(timings) / len(timings)}
+    for name, q in (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99)):
+        summary[name] = percentile(timings, q)
+    summary["max_ms"] = timings[-1]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py directory [--queries N] "
+              "[--searches bfs,bidirectional,landmarks] [--modes dict,compact]"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--queries", type=int, default=100,
+                        help="number of random pairs to time")
+    parser.add_argument("--searches", default="bfs,bidirectional",
+                        help="comma-separated searches to time")
+    parser.add_argument("--modes", default="dict,compact",
+                        help="comma-separated data models to load")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    searches = [search for search in args.searches.split(",") if search]
+    for search in searches:
+        if search not in SEARCHES:
+            parser.error(f"unknown search {search}")
+    modes = [mode for mode in args.modes.split(",") if mode]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode {mode}")
+
+    # A fresh interpreter per mode keeps load time and peak memory honest
+    context = multiprocessing.get_context("spawn")
+    for mode in modes:
+        with context.Pool(1) as pool:
+            results = pool.apply(run, (args.directory, mode == "compact",
+                                       searches, args.queries, args.seed))
+
+        print(f"{mode}: load {results['load_s']:.2f}s, "
+              f"peak RSS {results['load_rss_mb']:.0f} MB after load, "
+              f"{results['peak_rss_mb']:.0f} MB after queries")
+        if "landmarks_index_s" in results:
+            print(f"    landmark index {results['landmarks_index_s']:.2f}s")
+        for name in ["neighbors"] + searches:
+            stats = results[name]
+            line = (f"    {name:<14} mean {stats['mean_ms']:9.3f} ms  "
+                    f"p50 {stats['p50_ms']:9.3f}  p90 {stats['p90_ms']:9.3f}  "
+                    f"p99 {stats['p99_ms']:9.3f}  max {stats['max_ms']:9.3f}")
+            if "explored_mean" in stats:
+                line += f"  explored {stats['explored_mean']:.0f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
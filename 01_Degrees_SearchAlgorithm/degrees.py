@@ -1,8 +1,15 @@
+import argparse
 import csv
+import heapq
+import itertools
+import os
 from queue import Empty
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import csv_stamps, load_graph
+from landmarks import LANDMARKS, LandmarkIndex
+from nameindex import NameIndex
+from util import Node, StackFrontier, IndexedQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,11 +20,43 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of the dicts above when loaded
+graph = None
 
-def load_data(directory):
+# Directory the data was loaded from
+data_directory = None
+
+# Person positions and landmark index, built lazily after load_data
+positions = None
+landmark_index = None
+
+# Prefix and typo-tolerant index over names
+name_index = None
+
+# Counters from the most recent search
+search_stats = {"explored": 0}
+
+
+def load_data(directory, compact=False):
     """
     Load data from CSV files into memory.
+
+    If compact, loads a CoStarGraph (from its snapshot when the CSVs are
+    unchanged) and points names, people and movies at read-only views
+    over it instead of filling the dictionaries.
     """
+    global graph, names, people, movies
+    global data_directory, positions, landmark_index, name_index
+    data_directory = directory
+    positions = landmark_index = name_index = None
+    if compact:
+        graph = load_graph(directory)
+        names, people, movies = graph.names, graph.people, graph.movies
+        return
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -53,15 +92,29 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    name_index = NameIndex(names)
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [directory] "
+              "[--bidirectional | --landmarks] [--compact] [--all N]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both source and target")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="A* search guided by the landmark index")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the integer-indexed CSR graph")
+    parser.add_argument("--all", type=int, metavar="N",
+                        help="count all shortest paths and print the first N")
+    args = parser.parse_args()
+    directory = args.directory
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=args.compact)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -71,19 +124,37 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.bidirectional:
+        path = bidirectional_shortest_path(source, target)
+    elif args.landmarks:
+        path = landmark_shortest_path(source, target)
+    else:
+        path = shortest_path(source, target)
+    print(f"{search_stats['explored']} nodes explored.")
 
     if path is None:
         print("Not connected.")
     else:
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
+
+        if args.all is not None:
+            print(f"{count_shortest_paths(source, target)} shortest paths.")
+            paths = all_shortest_paths(source, target)
+            for n, path in enumerate(itertools.islice(paths, args.all), 1):
+                print(f"Path {n}:")
+                print_path(source, path)
+
+
+def print_path(source, path):
+    """Prints each step of a path of (movie_id, person_id) pairs."""
+    path = [(None, source)] + path
+    for i in range(len(path) - 1):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
 def shortest_path(source, target):
@@ -93,10 +164,15 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+        path, search_stats["explored"] = graph.shortest_path(source, target)
+        return None if path is None else graph.path_ids(path)
+
     num_explored = 0
 
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
 
     explored = set()
@@ -104,12 +180,14 @@ def shortest_path(source, target):
     while True:
 
         if frontier.empty():
-            raise Exception("no solution")
+            search_stats["explored"] = num_explored
+            return None
 
         node = frontier.remove()
         num_explored += 1
 
         if node.state == target:
+            search_stats["explored"] = num_explored
             path = []
             while node.parent is not None:
                 path.append((node.action, node.state))
@@ -125,6 +203,376 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends and stopping once the two searches meet.
+
+    If no possible path, returns None.
+    """
+    num_explored = 0
+
+    if source == target:
+        search_stats["explored"] = num_explored
+        return []
+
+    state, neighbors, movie_id_of, person_id_of = search_space()
+    source, target = state(source), state(target)
+
+    # Maps each person to the (movie, person) step that reached it:
+    # towards the source for forward, towards the target for backward
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Grow the smaller side by one full layer
+        if len(forward_layer) <= len(backward_layer):
+            layer, visited, other = forward_layer, forward, backward
+        else:
+            layer, visited, other = backward_layer, backward, forward
+
+        next_layer = []
+        meeting = None
+        for person in layer:
+            num_explored += 1
+            for movie, neighbor in neighbors(person):
+                if neighbor in visited:
+                    continue
+                visited[neighbor] = (movie, person)
+                next_layer.append(neighbor)
+                if meeting is None and neighbor in other:
+                    meeting = neighbor
+
+        if meeting is not None:
+            search_stats["explored"] = num_explored
+            return [(movie_id_of(movie), person_id_of(person))
+                    for movie, person in _join_paths(forward, backward,
+                                                     meeting)]
+
+        if layer is forward_layer:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    search_stats["explored"] = num_explored
+    return None
+
+
+def _join_paths(forward, backward, meeting):
+    """
+    Builds the source-to-target path through the person where
+    the forward and backward searches met.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, previous = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, following = backward[person_id]
+        path.append((movie_id, following))
+        person_id = following
+    return path
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns the DAG of every shortest path from source to target as a
+    dict mapping each person_id reached before the search stopped to the
+    list of (movie_id, person_id) steps that reach it from the previous
+    BFS layer. The source maps to an empty list.
+
+    If no possible path, returns None.
+    """
+    state, neighbors, movie_id_of, person_id_of = search_space()
+    source, target = state(source), state(target)
+
+    parents = {source: []}
+    layer = [source]
+    num_explored = 0
+    while layer and target not in parents:
+        # Record every parent in this layer before moving to the next
+        next_parents = {}
+        for person in layer:
+            num_explored += 1
+            for movie, neighbor in neighbors(person):
+                if neighbor not in parents:
+                    next_parents.setdefault(neighbor, []).append(
+                        (movie, person)
+                    )
+        parents.update(next_parents)
+        layer = list(next_parents)
+
+    search_stats["explored"] = num_explored
+    if target not in parents:
+        return None
+    if graph is None:
+        return parents
+    return {person_id_of(person): [(movie_id_of(movie), person_id_of(parent))
+                                   for movie, parent in steps]
+            for person, steps in parents.items()}
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many distinct shortest lists of (movie_id, person_id)
+    pairs connect source to target, without listing them.
+    """
+    parents = shortest_path_dag(source, target)
+    if parents is None:
+        return 0
+
+    # parents is in BFS order, so every parent is counted before its child
+    ways = {}
+    for person_id, steps in parents.items():
+        if not steps:
+            ways[person_id] = 1
+        else:
+            ways[person_id] = sum(ways[parent] for _, parent in steps)
+    return ways[target]
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect source to target, one at a time.
+    """
+    parents = shortest_path_dag(source, target)
+    if parents is None:
+        return
+
+    def paths_to(person_id):
+        if not parents[person_id]:
+            yield []
+            return
+        for movie_id, parent in sorted(parents[person_id]):
+            for path in paths_to(parent):
+                path.append((movie_id, person_id))
+                yield path
+
+    yield from paths_to(target)
+
+
+def landmark_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using A* search with
+    landmark distances as the heuristic.
+
+    If no possible path, returns None.
+    """
+    count, position, person_at, movie_at, neighbors = person_positions()
+    index = get_landmark_index()
+    start, goal = position(source), position(target)
+    num_explored = 0
+
+    # Maps position to its (movie, position) parent step and path length
+    parents = {start: None}
+    lengths = {start: 0}
+    bound = index.bound(start, goal)
+    frontier = [(bound, 0, start)] if bound is not None else []
+    closed = set()
+
+    while frontier:
+        _, length, person = heapq.heappop(frontier)
+        if person in closed:
+            continue
+        closed.add(person)
+        num_explored += 1
+
+        if person == goal:
+            search_stats["explored"] = num_explored
+            path = []
+            while parents[person] is not None:
+                movie, previous = parents[person]
+                path.append((movie_at(movie), person_at(person)))
+                person = previous
+            path.reverse()
+            return path
+
+        for movie, other in neighbors(person):
+            if other in closed or lengths.get(other, count) <= length + 1:
+                continue
+            bound = index.bound(other, goal)
+            if bound is None:
+                continue
+            parents[other] = (movie, person)
+            lengths[other] = length + 1
+            heapq.heappush(frontier, (length + 1 + bound, length + 1, other))
+
+    search_stats["explored"] = num_explored
+    return None
+
+
+def search_space():
+    """
+    Returns (state, neighbors, movie_id, person_id) for searches that
+    should run on whichever data model is loaded: state(person_id) gives
+    the search state of a person, neighbors(state) yields (movie, state)
+    pairs of co-stars, and movie_id and person_id turn movies and states
+    back into ids. In compact mode states and movies are graph indices,
+    so ids are only decoded for the path returned.
+    """
+    if graph is not None:
+        return (graph.person_index, graph.neighbors,
+                graph.movie_ids.__getitem__, graph.person_ids.__getitem__)
+
+    def same(value):
+        return value
+
+    return same, neighbors_for_person, same, same
+
+
+def person_positions():
+    """
+    Numbers people 0..count-1 in load order, the numbering the landmark
+    index uses. Returns (count, position, person_at, movie_at, neighbors):
+    position(person_id) gives a position, person_at and movie_at turn
+    positions and movies back into ids, and neighbors(position) yields
+    (movie, position) pairs of co-stars.
+    """
+    global positions
+    if positions is not None:
+        return positions
+
+    if graph is not None:
+        positions = (len(graph.person_ids), graph.person_index,
+                     graph.person_ids.__getitem__,
+                     graph.movie_ids.__getitem__, graph.neighbors)
+        return positions
+
+    person_ids = list(people)
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+
+    def neighbors(person):
+        for movie_id, person_id in neighbors_for_person(person_ids[person]):
+            yield movie_id, index[person_id]
+
+    positions = (len(person_ids), index.get, person_ids.__getitem__,
+                 lambda movie_id: movie_id, neighbors)
+    return positions
+
+
+def get_landmark_index():
+    """
+    Returns the landmark index for the loaded data, reading it from
+    the data directory or building and saving it on first use.
+    """
+    global landmark_index
+    if landmark_index is not None:
+        return landmark_index
+
+    count, position, person_at, movie_at, neighbors = person_positions()
+    path = os.path.join(data_directory, LANDMARKS)
+    stamps = csv_stamps(data_directory)
+    if os.path.exists(path):
+        landmark_index = LandmarkIndex.load(path, stamps, count)
+    if landmark_index is None:
+        if graph is not None:
+            offsets = graph.person_offsets
+
+            def degree(person):
+                return offsets[person + 1] - offsets[person]
+        else:
+            def degree(person):
+                return len(people[person_at(person)]["movies"])
+
+        landmark_index = LandmarkIndex.build(
+            count,
+            lambda person: (other for _, other in neighbors(person)),
+            degree
+        )
+        try:
+            landmark_index.save(path, stamps)
+        except OSError:
+            pass
+    return landmark_index
+
+
+def paths_from_source(source, targets):
+    """
+    Returns a dict mapping each of targets to the shortest list of
+    (movie_id, person_id) pairs from source, or None if not connected.
+
+    One breadth-first search from source answers every target.
+    """
+    if graph is not None:
+        indices = {graph.person_index(target): target for target in targets}
+        paths = graph.paths_from(graph.person_index(source), indices)
+        return {indices[target]: None if path is None else graph.path_ids(path)
+                for target, path in paths.items()}
+
+    remaining = set(targets)
+    paths = {target: None for target in remaining}
+
+    # Maps person_id to the (movie_id, person_id) step that reached it
+    parents = {source: None}
+    layer = [source]
+    remaining.discard(source)
+    while layer and remaining:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in parents:
+                    parents[neighbor] = (movie_id, person_id)
+                    remaining.discard(neighbor)
+                    next_layer.append(neighbor)
+        layer = next_layer
+
+    for target in paths:
+        if target in parents:
+            path = []
+            person_id = target
+            while parents[person_id] is not None:
+                movie_id, previous = parents[person_id]
+                path.append((movie_id, person_id))
+                person_id = previous
+            path.reverse()
+            paths[target] = path
+    return paths
+
+
+def resolve_person(name):
+    """
+    Returns the person_id for a person_id or name, without prompting.
+
+    Raises LookupError if the name is unknown or ambiguous.
+    """
+    if name in people:
+        return name
+    person_ids = names.get(name.lower(), set())
+    if not person_ids:
+        suggestions = get_name_index().suggest(name, 5)
+        if suggestions:
+            raise LookupError(f"person not found: {name} "
+                              f"(did you mean: {', '.join(suggestions)})")
+        raise LookupError(f"person not found: {name}")
+    if len(person_ids) > 1:
+        raise LookupError(
+            f"ambiguous name: {name} ({', '.join(sorted(person_ids))})"
+        )
+    return next(iter(person_ids))
+
+
+def get_name_index():
+    """
+    Returns the NameIndex over names, building it on first use when
+    load_data did not (compact mode).
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -132,6 +580,22 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = get_name_index().suggest(name, 5)
+        if not suggestions:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
+        person_ids = [person_id for suggestion in suggestions
+                      for person_id in sorted(names[suggestion])]
+        for person_id in person_ids:
+            person = people[person_id]
+            print(f"ID: {person_id}, Name: {person['name']}, "
+                  f"Birth: {person['birth']}")
+        try:
+            person_id = input("Intended Person ID: ")
+            if person_id in person_ids:
+                return person_id
+        except ValueError:
+            pass
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -156,6 +620,11 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        person = graph.person_index(person_id)
+        return {(graph.movie_ids[movie], graph.person_ids[other])
+                for movie, other in graph.neighbors(person)}
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,94 @@
+import argparse
+import csv
+import os
+import random
+from itertools import accumulate
+
+SYLLABLES = ["al", "an", "ar", "be", "ca", "da", "del", "el", "en", "fa",
+             "ga", "ha", "is", "ja", "ka", "la", "le", "li", "ma", "mi",
+             "na", "ne", "ni", "o", "ra", "re", "ri", "ro", "sa", "se",
+             "son", "ta", "te", "to", "va", "vi", "wa", "za"]
+
+
+def random_name(rng):
+    """Returns a made-up "First Last" name."""
+    def word():
+        return "".join(rng.choice(SYLLABLES)
+                       for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{word()} {word()}"
+
+
+def cast_size(rng, exponent, largest):
+    """Draws a power-law cast size between 1 and largest."""
+    return min(largest, int(rng.paretovariate(exponent)))
+
+
+def generate(directory, edges, seed=0, exponent=1.5, largest=200):
+    """
+    Writes people.csv, movies.csv and stars.csv with about edges star
+    rows to directory.
+
+    Cast sizes follow a power law, and people are drawn with power-law
+    weights, so a few people appear in very many movies, as in the
+    real data.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    num_people = max(2, edges // 4)
+
+    # Person popularity weights, cumulative for fast weighted choice
+    weights = list(accumulate(rng.paretovariate(exponent)
+                              for _ in range(num_people)))
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        f.write("id,name,birth\n")
+        for i in range(num_people):
+            writer.writerow([i + 1, random_name(rng), rng.randint(1900, 2010)])
+
+    movies = 0
+    written = 0
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w",
+                 encoding="utf-8", newline="") as stars_file:
+        movie_writer = csv.writer(movies_file, quoting=csv.QUOTE_NONNUMERIC)
+        movies_file.write("id,title,year\n")
+        stars_file.write("person_id,movie_id\n")
+        while written < edges:
+            movies += 1
+            title = " ".join(rng.choice(SYLLABLES).capitalize()
+                             for _ in range(rng.randint(1, 3)))
+            movie_writer.writerow([movies, title, rng.randint(1920, 2022)])
+
+            size = min(cast_size(rng, exponent, largest), edges - written)
+            cast = set(rng.choices(range(1, num_people + 1),
+                                   cum_weights=weights, k=size))
+            stars_file.writelines(f"{person},{movies}\n" for person in cast)
+            written += len(cast)
+    return num_people, movies, written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python generate.py directory [--edges N] [--seed S]"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--edges", type=int, default=10000,
+                        help="approximate number of stars.csv rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--exponent", type=float, default=1.5,
+                        help="power-law exponent for cast sizes and fame")
+    parser.add_argument("--largest", type=int, default=200,
+                        help="largest cast size")
+    args = parser.parse_args()
+
+    people, movies, stars = generate(args.directory, args.edges, args.seed,
+                                     args.exponent, args.largest)
+    print(f"Wrote {people} people, {movies} movies and {stars} stars "
+          f"to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+import csv
+import json
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+# Snapshot file written next to the CSVs by load_graph
+SNAPSHOT = "degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP1"
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+TABLES = ("person_ids", "person_names", "person_births",
+          "movie_ids", "movie_titles", "movie_years")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people",
+          "person_order", "movie_order", "name_order")
+
+
+class StringTable():
+    """
+    Sequence of strings stored as one UTF-8 blob plus an offsets array.
+    """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_list(cls, strings):
+        offsets = array("q", [0])
+        parts = []
+        size = 0
+        for string in strings:
+            data = string.encode("utf-8")
+            parts.append(data)
+            size += len(data)
+            offsets.append(size)
+        return cls(b"".join(parts), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class CoStarGraph():
+    """
+    Person/movie bipartite graph with dense integer indices and
+    array-backed CSR adjacency in both directions.
+    """
+    def __init__(self, tables, arrays):
+        self.tables = tables
+        self.arrays = arrays
+        self.person_ids = tables["person_ids"]
+        self.person_names = tables["person_names"]
+        self.person_births = tables["person_births"]
+        self.movie_ids = tables["movie_ids"]
+        self.movie_titles = tables["movie_titles"]
+        self.movie_years = tables["movie_years"]
+
+        # person_movies[person_offsets[p]:person_offsets[p + 1]] are the
+        # movies of person p; movie_people is laid out the same way
+        self.person_offsets = arrays["person_offsets"]
+        self.person_movies = arrays["person_movies"]
+        self.movie_offsets = arrays["movie_offsets"]
+        self.movie_people = arrays["movie_people"]
+
+        # Indices sorted by id and by lowercase name, for bisect lookups
+        self.person_order = arrays["person_order"]
+        self.movie_order = arrays["movie_order"]
+        self.name_order = arrays["name_order"]
+
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+        self.names = NamesView(self)
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Builds the graph straight from the CSV files in directory.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        edge_people, edge_movies = array("i"), array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                edge_people.append(person)
+                edge_movies.append(movie)
+        del person_index, movie_index
+
+        person_offsets, person_movies = _csr(
+            edge_people, edge_movies, len(person_ids)
+        )
+        movie_offsets, movie_people = _csr(
+            edge_movies, edge_people, len(movie_ids)
+        )
+        tables = {
+            "person_ids": StringTable.from_list(person_ids),
+            "person_names": StringTable.from_list(person_names),
+            "person_births": StringTable.from_list(person_births),
+            "movie_ids": StringTable.from_list(movie_ids),
+            "movie_titles": StringTable.from_list(movie_titles),
+            "movie_years": StringTable.from_list(movie_years),
+        }
+        arrays = {
+            "person_offsets": person_offsets,
+            "person_movies": person_movies,
+            "movie_offsets": movie_offsets,
+            "movie_people": movie_people,
+            "person_order": _order(person_ids),
+            "movie_order": _order(movie_ids),
+            "name_order": _order([name.lower() for name in person_names]),
+        }
+        return cls(tables, arrays)
+
+    def save(self, path, stamps):
+        """
+        Writes the graph to a snapshot file at path.
+
+        The file is the magic bytes, an 8-byte header length, a JSON
+        header (CSV stamps and section layout) and then every array as
+        raw machine data aligned to 8 bytes, ready to be memory-mapped.
+        """
+        buffers = []
+        for name in TABLES:
+            table = self.tables[name]
+            buffers.append((f"{name}.blob", "B", bytes(table.blob)))
+            buffers.append((f"{name}.offsets", "q", table.offsets))
+        for name in ARRAYS:
+            buffers.append((name, "i", self.arrays[name]))
+
+        sections = {}
+        position = 0
+        for name, typecode, buffer in buffers:
+            size = memoryview(buffer).nbytes
+            sections[name] = [typecode, position, size]
+            position += _padded(size)
+        header = json.dumps({"stamps": stamps, "sections": sections}).encode()
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header + bytes(_padded(len(header)) - len(header)))
+            for name, typecode, buffer in buffers:
+                size = memoryview(buffer).nbytes
+                f.write(buffer)
+                f.write(bytes(_padded(size) - size))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, stamps=None):
+        """
+        Memory-maps a snapshot file written by save.
+
+        Returns None if the file is not a snapshot or is damaged or, when
+        stamps is given, if it was built from CSVs with different stamps.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            length = int.from_bytes(f.read(8), "little")
+            try:
+                header = json.loads(f.read(length))
+                if stamps is not None and header["stamps"] != stamps:
+                    return None
+                sections = header["sections"]
+            except (ValueError, TypeError, KeyError):
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(mapped)
+
+        start = len(SNAPSHOT_MAGIC) + 8 + _padded(length)
+        try:
+            views = {}
+            for name, (typecode, position, size) in sections.items():
+                if position < 0 or size < 0 \
+                        or start + position + size > len(data):
+                    return None
+                view = data[start + position:start + position + size]
+                views[name] = view if typecode == "B" else view.cast(typecode)
+
+            tables = {name: StringTable(views[f"{name}.blob"],
+                                        views[f"{name}.offsets"])
+                      for name in TABLES}
+            arrays = {name: views[name] for name in ARRAYS}
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+        return cls(tables, arrays)
+
+    def person_index(self, person_id):
+        """Returns the index of person_id, or None if unknown."""
+        return _lookup(self.person_order, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """Returns the index of movie_id, or None if unknown."""
+        return _lookup(self.movie_order, self.movie_ids, movie_id)
+
+    def movies_for(self, person):
+        """Returns the movie indices of person index."""
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """Returns the person indices of movie index."""
+        offsets = self.movie_offsets
+        return self.movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with the person at the given index.
+        """
+        for movie in self.movies_for(person):
+            for other in self.stars_for(movie):
+                yield movie, other
+
+    def shortest_path(self, source, target):
+        """
+        Breadth-first search between two person indices.
+
+        Returns (path, num_explored) where path is the shortest list of
+        (movie, person) index pairs, or None if there is no path.
+        Each movie's cast is expanded at most once.
+        """
+        if source == target:
+            return [], 1
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_people = self.movie_offsets, self.movie_people
+        visited = bytearray(len(person_offsets) - 1)
+        expanded = bytearray(len(movie_offsets) - 1)
+        parent_person = {}
+        parent_movie = {}
+
+        visited[source] = 1
+        layer = [source]
+        num_explored = 0
+        while layer:
+            next_layer = []
+            for person in layer:
+                num_explored += 1
+                start, end = person_offsets[person], person_offsets[person + 1]
+                for movie in person_movies[start:end]:
+                    if expanded[movie]:
+                        continue
+                    expanded[movie] = 1
+                    start, end = movie_offsets[movie], movie_offsets[movie + 1]
+                    for other in movie_people[start:end]:
+                        if visited[other]:
+                            continue
+                        visited[other] = 1
+                        parent_person[other] = person
+                        parent_movie[other] = movie
+                        if other == target:
+                            path = []
+                            while other != source:
+                                path.append((parent_movie[other], other))
+                                other = parent_person[other]
+                            path.reverse()
+                            return path, num_explored
+                        next_layer.append(other)
+            layer = next_layer
+        return None, num_explored
+
+    def paths_from(self, source, targets):
+        """
+        Breadth-first search from one person index that answers several
+        target indices with the same BFS tree.
+
+        Returns a dict mapping each target to its shortest list of
+        (movie, person) index pairs, or None if it is not reachable.
+        """
+        remaining = set(targets)
+        paths = {target: None for target in remaining}
+        if source in remaining:
+            paths[source] = []
+            remaining.discard(source)
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_people = self.movie_offsets, self.movie_people
+        visited = bytearray(len(person_offsets) - 1)
+        expanded = bytearray(len(movie_offsets) - 1)
+        parent_person = {}
+        parent_movie = {}
+
+        visited[source] = 1
+        layer = [source]
+        while layer and remaining:
+            next_layer = []
+            for person in layer:
+                start, end = person_offsets[person], person_offsets[person + 1]
+                for movie in person_movies[start:end]:
+                    if expanded[movie]:
+                        continue
+                    expanded[movie] = 1
+                    start, end = movie_offsets[movie], movie_offsets[movie + 1]
+                    for other in movie_people[start:end]:
+                        if visited[other]:
+                            continue
+                        visited[other] = 1
+                        parent_person[other] = person
+                        parent_movie[other] = movie
+                        remaining.discard(other)
+                        next_layer.append(other)
+            layer = next_layer
+
+        for target in paths:
+            if target != source and target in parent_person:
+                path = []
+                other = target
+                while other != source:
+                    path.append((parent_movie[other], other))
+                    other = parent_person[other]
+                path.reverse()
+                paths[target] = path
+        return paths
+
+    def path_ids(self, path):
+        """
+        Converts a path of (movie, person) indices into the usual
+        (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+class PeopleView(Mapping):
+    """
+    Read-only person_id -> {name, birth, movies} mapping over a graph,
+    shaped like degrees.people.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie]
+                       for movie in graph.movies_for(person)}
+        }
+
+    def __iter__(self):
+        return (self.graph.person_ids[i]
+                for i in range(len(self.graph.person_ids)))
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only movie_id -> {title, year, stars} mapping over a graph,
+    shaped like degrees.movies.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person]
+                      for person in graph.stars_for(movie)}
+        }
+
+    def __iter__(self):
+        return (self.graph.movie_ids[i]
+                for i in range(len(self.graph.movie_ids)))
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only lowercase name -> set of person_ids mapping over a graph,
+    shaped like degrees.names.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def _name(self, person):
+        return self.graph.person_names[person].lower()
+
+    def __getitem__(self, name):
+        order = self.graph.name_order
+        i = bisect_left(order, name, key=self._name)
+        person_ids = set()
+        while i < len(order) and self._name(order[i]) == name:
+            person_ids.add(self.graph.person_ids[order[i]])
+            i += 1
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self._name(person)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def load_graph(directory):
+    """
+    Returns the CoStarGraph for directory, memory-mapping its snapshot
+    when one exists for the current CSVs, and otherwise building it
+    from the CSVs and writing a fresh snapshot.
+    """
+    path = os.path.join(directory, SNAPSHOT)
+    stamps = csv_stamps(directory)
+    if os.path.exists(path):
+        graph = CoStarGraph.load(path, stamps)
+        if graph is not None:
+            return graph
+
+    graph = CoStarGraph.from_csv(directory)
+    try:
+        graph.save(path, stamps)
+    except OSError:
+        pass
+    return graph
+
+
+def csv_stamps(directory):
+    """Returns the [size, mtime_ns] of each CSV file in directory."""
+    stamps = {}
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def _padded(size):
+    """Rounds size up to a multiple of 8 bytes."""
+    return (size + 7) // 8 * 8
+
+
+def _csr(sources, targets, n):
+    """
+    Groups targets by source index into (offsets, values) arrays,
+    with each group sorted and free of duplicates.
+    """
+    counts = [0] * (n + 1)
+    for source in sources:
+        counts[source + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+
+    grouped = array("i", bytes(4 * len(targets)))
+    position = counts[:-1]
+    for source, target in zip(sources, targets):
+        grouped[position[source]] = target
+        position[source] += 1
+
+    offsets = array("i", [0])
+    values = array("i")
+    for i in range(n):
+        values.extend(sorted(set(grouped[counts[i]:counts[i + 1]])))
+        offsets.append(len(values))
+    return offsets, values
+
+
+def _order(keys):
+    """Returns the indices of keys in sorted key order."""
+    return array("i", sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def _lookup(order, table, key):
+    """Finds the index whose table entry equals key via the sorted order."""
+    i = bisect_left(order, key, key=table.__getitem__)
+    if i < len(order) and table[order[i]] == key:
+        return order[i]
+    return None
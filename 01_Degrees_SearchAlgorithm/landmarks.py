@@ -0,0 +1,124 @@
+import json
+import os
+from array import array
+
+# Saved next to the CSVs by degrees.get_landmark_index
+LANDMARKS = "landmarks.bin"
+LANDMARKS_MAGIC = b"DEGLMK01"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+    """
+    BFS distances from a few well-connected people ("landmarks") to every
+    person, giving an admissible A* bound through the triangle inequality.
+    People are identified by their position 0..count-1.
+    """
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, count, neighbors, degree, size=16):
+        """
+        Picks size landmarks among the best-connected people, each one the
+        candidate farthest from those already picked, and records the BFS
+        distances from every landmark.
+
+        neighbors(i) yields the positions of i's co-stars and degree(i)
+        ranks how well-connected i is.
+        """
+        candidates = sorted(range(count), key=degree, reverse=True)
+        candidates = candidates[:size * 10]
+        landmarks, distances = [], []
+        while candidates and len(landmarks) < size:
+            if landmarks:
+                landmark = max(candidates, key=lambda c: min(
+                    d[c] for d in distances
+                ))
+            else:
+                landmark = candidates[0]
+            candidates.remove(landmark)
+            landmarks.append(landmark)
+            distances.append(bfs_distances(count, neighbors, landmark))
+        return cls(landmarks, distances)
+
+    def save(self, path, stamps):
+        """Writes the index to path with the CSV stamps it was built from."""
+        header = json.dumps({"stamps": stamps,
+                             "landmarks": self.landmarks}).encode()
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(LANDMARKS_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for distances in self.distances:
+                f.write(distances)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, stamps, count):
+        """
+        Reads an index written by save, or returns None if it was built
+        from different CSVs or the file is damaged.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(LANDMARKS_MAGIC)) != LANDMARKS_MAGIC:
+                return None
+            length = int.from_bytes(f.read(8), "little")
+            try:
+                header = json.loads(f.read(length))
+                if header["stamps"] != stamps:
+                    return None
+            except (ValueError, TypeError, KeyError):
+                return None
+            distances = []
+            for _ in header["landmarks"]:
+                row = array("B")
+                row.frombytes(f.read(count))
+                if len(row) != count:
+                    return None
+                distances.append(row)
+        return cls(header["landmarks"], distances)
+
+    def bound(self, u, v):
+        """
+        Returns a lower bound on the degrees of separation between
+        positions u and v, or None if some landmark proves they are
+        not connected.
+        """
+        best = 0
+        for distances in self.distances:
+            du, dv = distances[u], distances[v]
+            if du == UNREACHABLE or dv == UNREACHABLE:
+                if du != dv:
+                    return None
+                continue
+            if du > dv:
+                du, dv = dv, du
+            if dv - du > best:
+                best = dv - du
+        return best
+
+
+def bfs_distances(count, neighbors, source):
+    """
+    Returns an array('B') of BFS distances from source, capped below
+    UNREACHABLE, which marks people source cannot reach.
+    """
+    distances = array("B", [UNREACHABLE]) * count
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth = min(depth + 1, UNREACHABLE - 1)
+        next_layer = []
+        for person in layer:
+            for other in neighbors(person):
+                if distances[other] == UNREACHABLE:
+                    distances[other] = depth
+                    next_layer.append(other)
+        layer = next_layer
+    return distances
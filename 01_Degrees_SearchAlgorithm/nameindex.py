@@ -0,0 +1,126 @@
+from bisect import bisect_left
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant lookup over lowercase names.
+
+    Prefixes bisect a sorted name list. Misspellings go through the words
+    of each name: every word is indexed under itself and under each of its
+    one-letter deletions, so the words within one edit of a query word are
+    found with a handful of dictionary lookups.
+    """
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.words = {}
+        for i, name in enumerate(self.names):
+            for word in set(name.split()):
+                self.words.setdefault(word, []).append(i)
+        self.deletions = {}
+        for word in self.words:
+            for deletion in set(deletions(word)):
+                self.deletions.setdefault(deletion, []).append(word)
+
+    def prefix(self, text, limit=10):
+        """Returns up to limit names starting with text, in sorted order."""
+        text = text.lower()
+        i = bisect_left(self.names, text)
+        matches = []
+        while (i < len(self.names) and len(matches) < limit
+               and self.names[i].startswith(text)):
+            matches.append(self.names[i])
+            i += 1
+        return matches
+
+    def similar_words(self, word):
+        """Returns the indexed words within one edit of word."""
+        similar = set()
+        if word in self.words:
+            similar.add(word)
+        # A letter missing from word
+        for candidate in self.deletions.get(word, ()):
+            similar.add(candidate)
+        for deletion in set(deletions(word)):
+            # An extra letter in word
+            if deletion in self.words:
+                similar.add(deletion)
+            # A wrong letter in word
+            for candidate in self.deletions.get(deletion, ()):
+                if edit_distance(word, candidate, 1) is not None:
+                    similar.add(candidate)
+        return similar
+
+    def fuzzy(self, text, limit=10, max_edits=2):
+        """
+        Returns up to limit (distance, name) pairs for names within
+        max_edits edits of text, closest first, where each word of text
+        is at most one edit from a word of the name.
+        """
+        text = text.lower()
+        words = text.split()
+        if not words:
+            return []
+
+        # Words close to each word of text, rarest across names first
+        groups = []
+        for word in words:
+            similar = self.similar_words(word)
+            if not similar:
+                return []
+            groups.append((sum(len(self.words[w]) for w in similar), similar))
+        groups.sort(key=lambda group: group[0])
+
+        candidates = set()
+        for word in groups[0][1]:
+            candidates.update(self.words[word])
+
+        matches = []
+        for i in candidates:
+            name = self.names[i]
+            if abs(len(name) - len(text)) > max_edits:
+                continue
+            name_words = set(name.split())
+            if any(name_words.isdisjoint(similar) for _, similar in groups):
+                continue
+            distance = edit_distance(text, name, max_edits)
+            if distance is not None:
+                matches.append((distance, name))
+        matches.sort()
+        return matches[:limit]
+
+    def suggest(self, text, limit=10):
+        """
+        Returns up to limit candidate names for text: an exact match,
+        then prefix matches, then misspellings by edit distance.
+        """
+        text = text.lower()
+        suggestions = self.prefix(text, limit)
+        for _, name in self.fuzzy(text, limit):
+            if name not in suggestions:
+                suggestions.append(name)
+        return suggestions[:limit]
+
+
+def deletions(word):
+    """Returns word with each one of its letters deleted in turn."""
+    return [word[:i] + word[i + 1:] for i in range(len(word))]
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between a and b, or None if it is
+    greater than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import socketserver
+import sys
+import time
+from collections import deque
+from functools import lru_cache
+
+import degrees
+
+
+class QueryServer():
+    """
+    Answers separation queries against data already loaded into degrees,
+    caching recent paths and recording per-query latency.
+    """
+    def __init__(self, cache_size=1024, history=10000):
+        self.path = lru_cache(maxsize=cache_size)(self._path)
+        self.latencies = deque(maxlen=history)
+
+    def _path(self, source, target):
+        path = degrees.shortest_path(source, target)
+        return None if path is None else tuple(path)
+
+    def answer(self, request):
+        """
+        Answers one request, a dict with "source" and "target" names or
+        person ids, or {"command": "stats"}. Returns a JSON-ready dict.
+        """
+        if request.get("command") == "stats":
+            return self.stats()
+
+        for field in ("source", "target"):
+            if field in request and not isinstance(request[field], str):
+                return {"error": f"{field} must be a string"}
+
+        start = time.perf_counter()
+        try:
+            source = degrees.resolve_person(request["source"])
+            target = degrees.resolve_person(request["target"])
+        except KeyError as e:
+            return {"error": f"missing field {e}"}
+        except LookupError as e:
+            return {"error": str(e)}
+
+        hits = self.path.cache_info().hits
+        path = self.path(source, target)
+        cached = self.path.cache_info().hits > hits
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latencies.append(elapsed)
+
+        response = {"source": source, "target": target, "cached": cached,
+                    "ms": round(elapsed, 3)}
+        if path is None:
+            response["degrees"] = None
+            response["path"] = None
+        else:
+            response["degrees"] = len(path)
+            response["path"] = [
+                {"movie_id": movie_id,
+                 "movie": degrees.movies[movie_id]["title"],
+                 "person_id": person_id,
+                 "person": degrees.people[person_id]["name"]}
+                for movie_id, person_id in path
+            ]
+        return response
+
+    def handle_line(self, line):
+        """Answers one JSON request line with one JSON response line."""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return json.dumps({"error": f"invalid JSON: {e}"})
+        if not isinstance(request, dict):
+            return json.dumps({"error": "request must be a JSON object"})
+        return json.dumps(self.answer(request), ensure_ascii=False)
+
+    def stats(self):
+        """Returns query count, latency percentiles and cache counters."""
+        latencies = sorted(self.latencies)
+        info = self.path.cache_info()
+        stats = {"queries": len(latencies), "cache_hits": info.hits,
+                 "cache_misses": info.misses, "cache_size": info.currsize}
+        for name, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            stats[name] = round(percentile(latencies, q), 3)
+        stats["max_ms"] = round(latencies[-1], 3) if latencies else 0.0
+        return stats
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def serve_socket(server, path):
+    """Serves newline-delimited JSON requests on a Unix socket at path."""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.decode("utf-8").strip()
+                if line:
+                    response = server.handle_line(line) + "\n"
+                    self.wfile.write(response.encode("utf-8"))
+                    self.wfile.flush()
+
+    if os.path.exists(path):
+        os.remove(path)
+    with socketserver.UnixStreamServer(path, Handler) as unix_server:
+        print(f"Listening on {path}", file=sys.stderr)
+        try:
+            unix_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python server.py [directory] [--socket PATH] [--cache N]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--socket", help="serve on this Unix socket path "
+                        "instead of reading requests from stdin")
+    parser.add_argument("--cache", type=int, default=1024,
+                        help="number of recent results to keep")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the integer-indexed CSR graph")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact)
+    print("Data loaded.", file=sys.stderr)
+
+    server = QueryServer(cache_size=args.cache)
+    if args.socket:
+        serve_socket(server, args.socket)
+    else:
+        for line in sys.stdin:
+            line = line.strip()
+            if line:
+                print(server.handle_line(line), flush=True)
+    print(json.dumps(server.stats()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Tic Tac Toe bitboards
+
+A position is two 9-bit integers, x and o, with bit 3 * i + j set when
+that player holds cell (i, j). Everything that can be is precomputed
+over all 512 occupancy patterns, so the search allocates nothing per node.
+"""
+
+FULL = 0b111111111
+
+# Bit masks of the 3 rows, 3 columns and 2 diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Cell index permutations for the 8 rotations and reflections of the board
+SYMMETRIES = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+)
+
+
+def _permute(bits, symmetry):
+    permuted = 0
+    for cell in range(9):
+        if bits >> symmetry[cell] & 1:
+            permuted |= 1 << cell
+    return permuted
+
+
+# WINNING[bits] is True if bits hold a complete line
+WINNING = tuple(any(bits & mask == mask for mask in WIN_MASKS)
+                for bits in range(512))
+
+# MOVES[occupied] lists the empty cells for an occupancy pattern
+MOVES = tuple(tuple(cell for cell in range(9) if not occupied >> cell & 1)
+              for occupied in range(512))
+
+# SYMMETRY_MAPS[s][bits] is bits under symmetry s
+SYMMETRY_MAPS = tuple(tuple(_permute(bits, symmetry) for bits in range(512))
+                      for symmetry in SYMMETRIES)
+
+# CELL_LINES[cell] lists the WIN_MASKS indices of the lines through cell
+CELL_LINES = tuple(tuple(line for line, mask in enumerate(WIN_MASKS)
+                         if mask >> cell & 1)
+                   for cell in range(9))
+
+# Centre, then corners, then edges: the cells that sit on most lines first
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# ORDERED_MOVES[occupied] lists the empty cells in ORDER
+ORDERED_MOVES = tuple(tuple(cell for cell in ORDER if not occupied >> cell & 1)
+                      for occupied in range(512))
+
+# Maps canonical position keys to their minimax value
+transpositions = {}
+
+# Counters for value: nodes searched, table lookups and hits
+search_stats = {"nodes": 0, "lookups": 0, "hits": 0}
+
+
+def x_to_move(x, o):
+    """Returns True if X has the next turn."""
+    return x.bit_count() == o.bit_count()
+
+
+def winner(x, o):
+    """Returns 1 if X has a line, -1 if O has one, 0 otherwise."""
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def is_terminal(x, o):
+    """Returns True if someone has a line or the board is full."""
+    return WINNING[x] or WINNING[o] or (x | o) == FULL
+
+
+def canonical(x, o):
+    """
+    Returns the same key for a position and all its rotations and
+    reflections.
+    """
+    return min((maps[x] << 9) | maps[o] for maps in SYMMETRY_MAPS)
+
+
+class Game():
+    """
+    A mutable position changed in place with push/pop. It keeps the
+    piece count and, per player, how many cells of each line they hold,
+    so a win or a full board is known as soon as a move is made.
+    """
+    def __init__(self, x=0, o=0):
+        self.x, self.o = x, o
+        self.count = (x | o).bit_count()
+        self.tallies = ([(x & mask).bit_count() for mask in WIN_MASKS],
+                        [(o & mask).bit_count() for mask in WIN_MASKS])
+        self.winners = [winner(x, o)]
+        self.history = []
+
+    def x_to_move(self):
+        return self.count & 1 == 0
+
+    def moves(self, ordered=False):
+        """Returns the empty cells, in ORDER if ordered."""
+        return (ORDERED_MOVES if ordered else MOVES)[self.x | self.o]
+
+    def winner(self):
+        """Returns 1 if X has a line, -1 if O has one, 0 otherwise."""
+        return self.winners[-1]
+
+    def terminal(self):
+        return self.winners[-1] != 0 or self.count == 9
+
+    def push(self, cell):
+        """Plays cell for the player to move."""
+        turn = self.count & 1
+        if turn:
+            self.o |= 1 << cell
+        else:
+            self.x |= 1 << cell
+        tallies = self.tallies[turn]
+        won = 0
+        for line in CELL_LINES[cell]:
+            tallies[line] += 1
+            if tallies[line] == 3:
+                won = -1 if turn else 1
+        self.winners.append(won)
+        self.history.append(cell)
+        self.count += 1
+
+    def pop(self):
+        """Takes back the last move."""
+        cell = self.history.pop()
+        self.count -= 1
+        turn = self.count & 1
+        if turn:
+            self.o &= ~(1 << cell)
+        else:
+            self.x &= ~(1 << cell)
+        tallies = self.tallies[turn]
+        for line in CELL_LINES[cell]:
+            tallies[line] -= 1
+        self.winners.pop()
+
+
+def value(x, o):
+    """
+    Returns the minimax value of a position (1 X wins, -1 O wins, 0 draw),
+    solving each position up to symmetry once per process.
+    """
+    return solve(Game(x, o))
+
+
+def solve(game):
+    """Returns the memoized minimax value of a Game."""
+    search_stats["lookups"] += 1
+    key = canonical(game.x, game.o)
+    if key in transpositions:
+        search_stats["hits"] += 1
+        return transpositions[key]
+    search_stats["nodes"] += 1
+
+    if game.winners[-1]:
+        best = game.winners[-1]
+    elif game.count == 9:
+        best = 0
+    elif game.count & 1 == 0:
+        best = -1
+        for cell in game.moves():
+            game.push(cell)
+            best = max(best, solve(game))
+            game.pop()
+            if best == 1:
+                break
+    else:
+        best = 1
+        for cell in game.moves():
+            game.push(cell)
+            best = min(best, solve(game))
+            game.pop()
+            if best == -1:
+                break
+
+    transpositions[key] = best
+    return best
+
+
+def best_move(x, o):
+    """
+    Returns the cell index of an optimal move for the player to move,
+    or None if the game is over.
+    """
+    game = Game(x, o)
+    if game.terminal():
+        return None
+    maximizing = game.x_to_move()
+    best_cell, best = None, None
+    for cell in game.moves():
+        game.push(cell)
+        score = solve(game)
+        game.pop()
+        if best is None or (score > best if maximizing else score < best):
+            best_cell, best = cell, score
+    return best_cell
+
+
+def alphabeta(x, o, alpha=-1, beta=1, on_node=None):
+    """
+    Returns the minimax value of a position with alpha-beta pruning,
+    trying moves in ORDER. Values outside (alpha, beta) are only bounds.
+
+    on_node, if given, is called once for every node visited.
+    """
+    return search(Game(x, o), alpha, beta, on_node)
+
+
+def search(game, alpha=-1, beta=1, on_node=None):
+    """Alpha-beta search of a Game, made and unmade in place."""
+    if on_node is not None:
+        on_node()
+    if game.winners[-1]:
+        return game.winners[-1]
+    if game.count == 9:
+        return 0
+
+    if game.count & 1 == 0:
+        for cell in game.moves(ordered=True):
+            game.push(cell)
+            score = search(game, alpha, beta, on_node)
+            game.pop()
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return alpha
+    for cell in game.moves(ordered=True):
+        game.push(cell)
+        score = search(game, alpha, beta, on_node)
+        game.pop()
+        beta = min(beta, score)
+        if alpha >= beta:
+            break
+    return beta
+
+
+def alphabeta_move(x, o, on_node=None):
+    """
+    Returns (cell, value) for an optimal move found by alpha-beta search,
+    or (None, value) if the game is over.
+    """
+    game = Game(x, o)
+    if game.terminal():
+        return None, game.winner()
+
+    maximizing = game.x_to_move()
+    best_cell, best = None, -2 if maximizing else 2
+    alpha, beta = -1, 1
+    for cell in game.moves(ordered=True):
+        game.push(cell)
+        score = search(game, alpha, beta, on_node)
+        game.pop()
+        if maximizing:
+            if score > best:
+                best_cell, best = cell, score
+                alpha = max(alpha, score)
+        else:
+            if score < best:
+                best_cell, best = cell, score
+                beta = min(beta, score)
+        if alpha >= beta:
+            break
+    return best_cell, best
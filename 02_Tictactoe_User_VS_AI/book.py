@@ -0,0 +1,157 @@
+"""
+Tic Tac Toe perfect-play table
+
+Every position is numbered by its base-3 code (cell c contributes 3 ** c
+times 0 for empty, 1 for X, 2 for O), and book.bin holds MAGIC then one
+byte per code: the best cell in the low 4 bits and the value + 1 in the
+next two. Codes that are not legal positions hold UNUSED.
+"""
+
+import os
+import sys
+
+import bitboard
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Starts book.bin, so files in an older or foreign format are rebuilt
+MAGIC = b"TTTBOOK1"
+
+# Stored for codes that are not reachable positions
+UNUSED = 0xFF
+
+# Stored in the low bits when the game is over
+NO_MOVE = 0x0F
+
+# TERNARY[bits] is the base-3 code of bits held by X
+TERNARY = tuple(sum(3 ** cell for cell in range(9) if bits >> cell & 1)
+                for bits in range(512))
+
+# Loaded by lookup on first use
+table = None
+
+
+def code(x, o):
+    """Returns the base-3 code of a position."""
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def positions():
+    """Yields every position reachable from the empty board once."""
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        yield x, o
+        if not bitboard.is_terminal(x, o):
+            for cell in bitboard.MOVES[x | o]:
+                if bitboard.x_to_move(x, o):
+                    stack.append((x | 1 << cell, o))
+                else:
+                    stack.append((x, o | 1 << cell))
+
+
+def build():
+    """
+    Solves every reachable position and returns the table as bytes.
+    Among optimal moves the first in bitboard.ORDER is kept.
+    """
+    data = bytearray([UNUSED]) * 3 ** 9
+    for x, o in positions():
+        value = bitboard.value(x, o)
+        cell = NO_MOVE
+        if not bitboard.is_terminal(x, o):
+            for move in bitboard.ORDERED_MOVES[x | o]:
+                if bitboard.x_to_move(x, o):
+                    child = bitboard.value(x | 1 << move, o)
+                else:
+                    child = bitboard.value(x, o | 1 << move)
+                if child == value:
+                    cell = move
+                    break
+        data[code(x, o)] = (value + 1) << 4 | cell
+    return bytes(data)
+
+
+def save(data, path=BOOK):
+    """
+    Writes the table to path through a temporary file, so readers (and
+    processes building it at the same time) never see a partial file.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC + data)
+    os.replace(temporary, path)
+
+
+def load(path=BOOK):
+    """
+    Returns the table from path, building and writing it first if the
+    file is missing, truncated or not in this format.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        data = b""
+    if data[:len(MAGIC)] == MAGIC and len(data) == len(MAGIC) + 3 ** 9:
+        return data[len(MAGIC):]
+
+    data = build()
+    try:
+        save(data, path)
+    except OSError:
+        pass
+    return data
+
+
+def lookup(x, o):
+    """
+    Returns (cell, value) for a position: an optimal cell to play (None
+    if the game is over) and its value, 1 X wins, -1 O wins, 0 draw.
+    """
+    global table
+    if table is None:
+        table = load()
+    entry = table[code(x, o)]
+    if entry == UNUSED:
+        raise ValueError("not a reachable position")
+    cell = entry & NO_MOVE
+    return None if cell == NO_MOVE else cell, (entry >> 4) - 1
+
+
+def check(data):
+    """
+    Compares every entry of data against a live alpha-beta search.
+    Returns the number of positions checked; raises AssertionError on
+    the first mismatch.
+    """
+    checked = 0
+    for x, o in positions():
+        entry = data[code(x, o)]
+        assert entry != UNUSED, f"missing position {x:09b} {o:09b}"
+        cell, value = entry & NO_MOVE, (entry >> 4) - 1
+        best_cell, best = bitboard.alphabeta_move(x, o)
+        assert value == best, f"value {value} != {best} at {x:09b} {o:09b}"
+        if best_cell is None:
+            assert cell == NO_MOVE
+        else:
+            if bitboard.x_to_move(x, o):
+                child = bitboard.alphabeta(x | 1 << cell, o)
+            else:
+                child = bitboard.alphabeta(x, o | 1 << cell)
+            assert child == best, f"move {cell} is not optimal"
+        checked += 1
+    return checked
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--check":
+        print(f"{check(load())} positions match live search.")
+    else:
+        data = build()
+        save(data)
+        print(f"Wrote {BOOK} ({len(data)} bytes).")
@@ -0,0 +1,211 @@
+"""
+Monte Carlo tree search for m,n,k games
+
+UCT over MNKGame positions with uniformly random playouts, for boards
+too large to search exhaustively. mcts takes the same list-of-lists
+boards as mnk.minimax and returns the move (i, j) with the most visits.
+"""
+
+import argparse
+import math
+import multiprocessing
+import random
+import time
+from collections import namedtuple
+
+import mnk
+
+# Weight of the exploration term in the UCT score
+EXPLORATION = math.sqrt(2)
+
+# Result of search: the most visited move, visits per root move and the
+# number of playouts run
+MCTSResult = namedtuple("MCTSResult", ["cell", "visits", "playouts"])
+
+
+class Node():
+    """
+    A position in the tree, reached by playing move from parent. score
+    sums the playout results for mover, the player who made move: 1 for
+    a win and 0.5 for a draw.
+    """
+    def __init__(self, move, parent, mover, untried):
+        self.move = move
+        self.parent = parent
+        self.mover = mover
+        self.untried = untried
+        self.children = []
+        self.visits = 0
+        self.score = 0.0
+
+    def select(self):
+        """Returns the child with the highest UCT score."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.score / child.visits
+            + EXPLORATION * math.sqrt(log_visits / child.visits)
+        ))
+
+
+def playout(game, rng):
+    """
+    Plays random moves from the position until the game ends, takes them
+    back and returns 1 if X won, -1 if O won and 0 for a draw.
+    """
+    if game.winners[-1]:
+        return game.winners[-1]
+    occupied = game.bits[0] | game.bits[1]
+    empty = [cell for cell in range(game.size) if not occupied >> cell & 1]
+    rng.shuffle(empty)
+    outcome = 0
+    played = 0
+    for cell in empty:
+        game.push(cell)
+        played += 1
+        if game.winners[-1]:
+            outcome = game.winners[-1]
+            break
+    for _ in range(played):
+        game.pop()
+    return outcome
+
+
+def search(game, playouts=None, budget_ms=1000, cancel=None, seed=None):
+    """
+    Runs UCT from the player to move until playouts playouts have been
+    run, budget_ms milliseconds have passed or cancel (a threading.Event)
+    is set, and returns an MCTSResult. Either limit may be None, but not
+    both.
+    """
+    if playouts is None and budget_ms is None:
+        raise ValueError("search needs a playout or time budget")
+    deadline = None if budget_ms is None \
+        else time.perf_counter() + budget_ms / 1000
+    rng = random.Random(seed)
+
+    mover = -1 if game.turn == 0 else 1
+    root = Node(None, None, mover, [] if game.terminal() else game.moves())
+    count = 0
+    while playouts is None or count < playouts:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if cancel is not None and cancel.is_set():
+            break
+
+        # Select down the tree, then expand one untried move
+        node = root
+        depth = 0
+        while not node.untried and node.children:
+            node = node.select()
+            game.push(node.move)
+            depth += 1
+        if node.untried:
+            i = rng.randrange(len(node.untried))
+            node.untried[i], node.untried[-1] = \
+                node.untried[-1], node.untried[i]
+            move = node.untried.pop()
+            game.push(move)
+            depth += 1
+            child = Node(move, node, -node.mover,
+                         [] if game.terminal() else game.moves())
+            node.children.append(child)
+            node = child
+
+        outcome = playout(game, rng)
+        for _ in range(depth):
+            game.pop()
+
+        while node is not None:
+            node.visits += 1
+            if outcome == node.mover:
+                node.score += 1
+            elif outcome == 0:
+                node.score += 0.5
+            node = node.parent
+        count += 1
+
+    visits = {child.move: child.visits for child in root.children}
+    cell = max(visits, key=visits.get) if visits else None
+    return MCTSResult(cell, visits, count)
+
+
+def _search_board(task):
+    """Worker entry point: one independent search from a board."""
+    board, k, playouts, budget_ms, seed = task
+    game = mnk.MNKGame.from_board(board, k)
+    found = search(game, playouts, budget_ms, seed=seed)
+    return found.visits, found.playouts
+
+
+def root_parallel(board, k=3, playouts=None, budget_ms=1000, workers=2,
+                  seed=None):
+    """
+    Runs an independent search per forked worker process, each with
+    playouts playouts (or the whole time budget), and returns an
+    MCTSResult with the visit counts of every worker summed.
+    """
+    base = random.randrange(2 ** 32) if seed is None else seed
+    tasks = [(board, k, playouts, budget_ms, base + i) for i in range(workers)]
+    visits = {}
+    total = 0
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        for worker_visits, count in pool.imap_unordered(_search_board, tasks):
+            for move, n in worker_visits.items():
+                visits[move] = visits.get(move, 0) + n
+            total += count
+    cell = max(visits, key=visits.get) if visits else None
+    return MCTSResult(cell, visits, total)
+
+
+def mcts(board, k=3, budget_ms=1000, cancel=None, playouts=None, workers=1,
+         seed=None):
+    """
+    Returns the action (i, j) chosen by Monte Carlo tree search for the
+    current player, or None if the game is over. With workers above 1
+    the search is split across processes, which ignore cancel.
+    """
+    game = mnk.MNKGame.from_board(board, k)
+    if game.terminal():
+        return None
+    if workers > 1:
+        cell = root_parallel(board, k, playouts, budget_ms, workers, seed).cell
+    else:
+        cell = search(game, playouts, budget_ms, cancel, seed).cell
+    return None if cell is None else divmod(cell, game.cols)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python mcts.py [rows] [cols] [k] [--playouts N] "
+              "[--budget-ms N] [--workers N]"
+    )
+    parser.add_argument("rows", type=int, nargs="?", default=3)
+    parser.add_argument("cols", type=int, nargs="?", default=3)
+    parser.add_argument("k", type=int, nargs="?", default=3)
+    parser.add_argument("--playouts", type=int, default=None,
+                        help="playouts per worker (default: time budget)")
+    parser.add_argument("--budget-ms", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    board = mnk.initial_state(args.rows, args.cols)
+    budget_ms = None if args.playouts else args.budget_ms
+    start = time.perf_counter()
+    if args.workers > 1:
+        found = root_parallel(board, args.k, args.playouts, budget_ms,
+                              args.workers, args.seed)
+    else:
+        found = search(mnk.MNKGame.from_board(board, args.k), args.playouts,
+                       budget_ms, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    move = divmod(found.cell, args.cols)
+    print(f"First move {move} after {found.playouts} playouts in "
+          f"{elapsed * 1000:.0f} ms ({found.playouts / elapsed:.0f}/s), "
+          f"{found.visits[found.cell]} visits")
+
+
+if __name__ == "__main__":
+    main()
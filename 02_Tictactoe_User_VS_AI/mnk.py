@@ -0,0 +1,268 @@
+"""
+m,n,k games
+
+Tic Tac Toe generalized to a rows x cols board where k in a row wins,
+with a depth-limited alpha-beta search, a line-count evaluator and
+iterative deepening under a time budget. Boards use the same
+list-of-lists layout as tictactoe.
+"""
+
+import time
+from collections import namedtuple
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a win, less the plies it takes, so quicker wins rank higher
+WIN = 1000000
+
+# Result of search: the move, its score for the player to move, the
+# deepest fully searched depth and the nodes visited
+SearchResult = namedtuple("SearchResult", ["cell", "score", "depth", "nodes"])
+
+
+class SearchTimeout(Exception):
+    """Raised inside search when the time budget runs out or it is cancelled."""
+
+
+class MNKGame():
+    """
+    A position on a rows x cols board as two bitboards, changed in place
+    with push/pop. Bit r * cols + c is cell (r, c).
+    """
+    def __init__(self, rows=3, cols=3, k=3):
+        self.rows, self.cols, self.k = rows, cols, k
+        self.size = rows * cols
+
+        # Every run of k cells in a row, column or diagonal, as a mask
+        self.windows = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        mask = 0
+                        for step in range(k):
+                            cell = (r + dr * step) * cols + c + dc * step
+                            mask |= 1 << cell
+                        self.windows.append(mask)
+        self.cell_windows = [[w for w in self.windows if w >> cell & 1]
+                             for cell in range(self.size)]
+
+        # Cells within two steps of each cell, and all cells centre first
+        self.near = []
+        for cell in range(self.size):
+            r, c = divmod(cell, cols)
+            mask = 0
+            for rr in range(max(0, r - 2), min(rows, r + 3)):
+                for cc in range(max(0, c - 2), min(cols, c + 3)):
+                    mask |= 1 << (rr * cols + cc)
+            self.near.append(mask)
+        centre_r, centre_c = (rows - 1) / 2, (cols - 1) / 2
+        self.order = sorted(range(self.size), key=lambda cell: (
+            abs(cell // cols - centre_r) + abs(cell % cols - centre_c)
+        ))
+
+        self.bits = [0, 0]
+        self.turn = 0
+        self.history = []
+        self.winners = [0]
+
+    @classmethod
+    def from_board(cls, board, k=3):
+        """Returns the game for a list-of-lists board."""
+        game = cls(len(board), len(board[0]), k)
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    game.bits[0] |= 1 << (i * game.cols + j)
+                elif cell == O:
+                    game.bits[1] |= 1 << (i * game.cols + j)
+        x_count, o_count = (bits.bit_count() for bits in game.bits)
+        game.turn = 0 if x_count == o_count else 1
+        if any(game.bits[0] & w == w for w in game.windows):
+            game.winners[-1] = 1
+        elif any(game.bits[1] & w == w for w in game.windows):
+            game.winners[-1] = -1
+        return game
+
+    def push(self, cell):
+        """Plays cell for the player to move."""
+        bits = self.bits[self.turn] | 1 << cell
+        self.bits[self.turn] = bits
+        won = any(bits & w == w for w in self.cell_windows[cell])
+        self.winners.append((1 if self.turn == 0 else -1) if won else 0)
+        self.history.append(cell)
+        self.turn ^= 1
+
+    def pop(self):
+        """Takes back the last move."""
+        cell = self.history.pop()
+        self.winners.pop()
+        self.turn ^= 1
+        self.bits[self.turn] &= ~(1 << cell)
+
+    def winner(self):
+        """Returns 1 if X has k in a row, -1 if O has, 0 otherwise."""
+        return self.winners[-1]
+
+    def full(self):
+        return (self.bits[0] | self.bits[1]).bit_count() == self.size
+
+    def terminal(self):
+        return self.winners[-1] != 0 or self.full()
+
+    def moves(self):
+        """
+        Returns the empty cells worth searching, centre first: those
+        within two steps of a piece, or every empty cell on an empty board.
+        """
+        occupied = self.bits[0] | self.bits[1]
+        if not occupied:
+            return list(self.order)
+        return [cell for cell in self.order
+                if not occupied >> cell & 1 and self.near[cell] & occupied]
+
+    def evaluate(self):
+        """
+        Scores the position for X by counting open lines: every window
+        holding only one player's pieces is worth 4 ** pieces to them.
+        """
+        x, o = self.bits
+        score = 0
+        for window in self.windows:
+            x_part, o_part = x & window, o & window
+            if x_part and not o_part:
+                score += 4 ** x_part.bit_count()
+            elif o_part and not x_part:
+                score -= 4 ** o_part.bit_count()
+        return score
+
+
+def search(game, budget_ms=1000, max_depth=None, cancel=None):
+    """
+    Iterative-deepening alpha-beta search from the player to move.
+
+    Searches depth 1, 2, ... until max_depth, the end of the game, the
+    budget in milliseconds runs out or cancel (a threading.Event) is
+    set, and returns the SearchResult of the deepest completed depth.
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    empty = game.size - (game.bits[0] | game.bits[1]).bit_count()
+    max_depth = empty if max_depth is None else min(max_depth, empty)
+    nodes = [0]
+
+    def check():
+        nodes[0] += 1
+        if nodes[0] & 1023 == 0 and (
+            time.perf_counter() > deadline
+            or (cancel is not None and cancel.is_set())
+        ):
+            raise SearchTimeout
+
+    def negamax(depth, alpha, beta, ply):
+        check()
+        if game.winners[-1]:
+            # The player who just moved has won
+            return -(WIN - ply)
+        if game.full():
+            return 0
+        if depth == 0:
+            sign = 1 if game.turn == 0 else -1
+            return sign * game.evaluate()
+        best = -WIN - 1
+        for cell in game.moves():
+            game.push(cell)
+            try:
+                score = -negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+            if score > best:
+                best = score
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+        return best
+
+    moves = game.moves()
+    result = SearchResult(moves[0] if moves else None, 0, 0, 0)
+    if game.terminal() or not moves:
+        return result
+
+    for depth in range(1, max_depth + 1):
+        try:
+            best_cell, best = None, -WIN - 1
+            alpha = -WIN - 1
+            for cell in moves:
+                game.push(cell)
+                try:
+                    score = -negamax(depth - 1, -WIN - 1, -alpha, 1)
+                finally:
+                    game.pop()
+                if score > best:
+                    best_cell, best = cell, score
+                    alpha = max(alpha, score)
+        except SearchTimeout:
+            break
+        result = SearchResult(best_cell, best, depth, nodes[0])
+        if abs(best) > WIN - game.size - 1:
+            break
+
+        # Search the best move first at the next depth
+        moves.remove(best_cell)
+        moves.insert(0, best_cell)
+    return result._replace(nodes=nodes[0])
+
+
+def initial_state(rows=3, cols=3):
+    """Returns an empty rows x cols board."""
+    return [[EMPTY] * cols for _ in range(rows)]
+
+
+def player(board):
+    """Returns player who has the next turn on a board."""
+    x_count = sum(row.count(X) for row in board)
+    o_count = sum(row.count(O) for row in board)
+    return X if x_count == o_count else O
+
+
+def actions(board):
+    """Returns set of all possible actions (i, j) available on the board."""
+    return {(i, j) for i, row in enumerate(board)
+            for j, cell in enumerate(row) if cell == EMPTY}
+
+
+def result(board, action):
+    """Returns the board that results from making move (i, j) on the board."""
+    i, j = action
+    if not (0 <= i < len(board) and 0 <= j < len(board[0])) \
+            or board[i][j] != EMPTY:
+        raise NameError('This cell is not available')
+    new_board = [list(row) for row in board]
+    new_board[i][j] = player(board)
+    return new_board
+
+
+def winner(board, k=3):
+    """Returns the winner of the game, if there is one."""
+    state = MNKGame.from_board(board, k).winner()
+    return X if state == 1 else O if state == -1 else None
+
+
+def terminal(board, k=3):
+    """Returns True if game is over, False otherwise."""
+    return MNKGame.from_board(board, k).terminal()
+
+
+def minimax(board, k=3, budget_ms=1000, cancel=None):
+    """
+    Returns the best action (i, j) found within budget_ms milliseconds
+    for the current player, or None if the game is over.
+    """
+    game = MNKGame.from_board(board, k)
+    if game.terminal():
+        return None
+    cell = search(game, budget_ms, cancel=cancel).cell
+    return None if cell is None else divmod(cell, game.cols)
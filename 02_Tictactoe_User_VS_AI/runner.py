@@ -1,9 +1,55 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
 
+
+class Cancelled(Exception):
+    """Raised inside a search to stop it once its move was cancelled."""
+
+
+class AIMove():
+    """
+    Computes the AI's move for a board on a background thread so the
+    event loop keeps drawing. If the table lookup fails, error holds the
+    exception and the move comes from a live alpha-beta search instead,
+    still off the main thread. Poll finished, then read move; call
+    cancel to discard the move and stop a live search early.
+    """
+    def __init__(self, board):
+        self.move = None
+        self.error = None
+        self.finished = False
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(board,),
+                                       daemon=True)
+        self.thread.start()
+
+    def run(self, board):
+        try:
+            move = ttt.minimax(board)
+        except Exception as e:
+            self.error = e
+            try:
+                move = ttt.alphabeta(board, on_node=self.check)
+            except Cancelled:
+                return
+            except Exception as e:
+                self.error = e
+                move = None
+        if not self.cancelled.is_set():
+            self.move = move
+            self.finished = True
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled()
+
+    def cancel(self):
+        self.cancelled.set()
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -19,7 +65,8 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_move = None
+clock = pygame.time.Clock()
 
 while True:
 
@@ -27,6 +74,14 @@ while True:
         if event.type == pygame.QUIT:
             sys.exit()
 
+        # Escape abandons the game, even while the AI is thinking
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            user = None
+            board = ttt.initial_state()
+            if ai_move is not None:
+                ai_move.cancel()
+                ai_move = None
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -102,21 +157,24 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (1 + int(time.time() * 3) % 3)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, computed off the main thread
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = AIMove(board)
+            elif ai_move.finished:
+                if ai_move.error is not None:
+                    print(f"AI move failed: {ai_move.error!r}",
+                          file=sys.stderr)
+                if ai_move.move is not None:
+                    board = ttt.result(board, ai_move.move)
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +199,9 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    if ai_move is not None:
+                        ai_move.cancel()
+                        ai_move = None
 
     pygame.display.flip()
+    clock.tick(60)
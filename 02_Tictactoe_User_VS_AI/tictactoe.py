@@ -2,16 +2,15 @@
 Tic Tac Toe Player
 """
 
-from audioop import add
-from copy import deepcopy
-from decimal import ROUND_DOWN
-import math
-from zoneinfo import available_timezones
+import bitboard
+import book
+from bitboard import search_stats, transpositions
 
 X = "X"
 O = "O"
 EMPTY = None
 
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -21,214 +20,155 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY]]
 
 
-def player(board):
+def to_bits(board):
     """
-    Returns player who has the next turn on a board.
+    Returns the (x, o) bitboards for a list-of-lists board.
     """
-    numberO = 0
-    numberX = 0
-
-    for row in board:
-        for cell in row:
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
             if cell == X:
-                numberX += 1
+                x |= 1 << (3 * i + j)
             elif cell == O:
-                numberO += 1
-
-    if numberO == numberX:
-        return X
-    else:
-        return O
-    
-    # raise NotImplementedError
+                o |= 1 << (3 * i + j)
+    return x, o
 
 
-def actions(board):
+def from_bits(x, o):
     """
-    Returns set of all possible actions (i, j) available on the board.
+    Returns the list-of-lists board for (x, o) bitboards.
     """
-    actions = set ()
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
 
-    row_number = -1
-    for row in board:
-        row_number += 1
-        cell_number = 0
-        for cell in row:
-            if cell != X and cell != O:
-                actions.add((row_number, cell_number))
-            cell_number += 1
 
-    return actions 
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if bitboard.x_to_move(*to_bits(board)) else O
+
 
-    # raise NotImplementedError
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x, o = to_bits(board)
+    return {divmod(cell, 3) for cell in bitboard.MOVES[x | o]}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-
-    available = actions(board)
-
-    if not action in available:
+    x, o = to_bits(board)
+    if action not in {divmod(cell, 3) for cell in bitboard.MOVES[x | o]}:
         raise NameError('This cell is not available')
 
-    current_player = player(board)
-    new_board = deepcopy(board)
-
-    row = action[0]
-    cell = action[1]
-
-    new_board[row][cell] = current_player
-
-    return new_board
-
-    # raise NotImplementedError
+    bit = 1 << (3 * action[0] + action[1])
+    if bitboard.x_to_move(x, o):
+        return from_bits(x | bit, o)
+    return from_bits(x, o | bit)
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    rowN = -1
-    for row in board:
-        rowN += 1
-        cellN = 0
-        
-        rowX, rowO, colX, colO = 0, 0, 0, 0
-        cruz1X, cruz1O, cruz2X, cruz2O = 0, 0, 0, 0
-        for cell in row:
-            if board[rowN][cellN] == X:
-                rowX += 1
-            elif board[rowN][cellN] == O:
-                rowO += 1
-            if board[cellN][rowN] == X:
-                colX += 1
-            elif board[cellN][rowN] == O:
-                colO += 1
-
-            if rowN == 0:
-                if board[cellN][cellN] == X:
-                    cruz1X += 1
-                elif board[cellN][cellN] == O:
-                    cruz1O += 1
-                if board[2 - cellN][cellN] == X:
-                    cruz2X += 1
-                elif board[2 - cellN][cellN] == O:
-                    cruz2O += 1
-            cellN += 1
-        if 3 in (rowX, colX, cruz1X, cruz2X):
-            return X
-        elif 3 in (rowO, colO, cruz1O, cruz2O):
-            return O
-
+    state = bitboard.winner(*to_bits(board))
+    if state == 1:
+        return X
+    elif state == -1:
+        return O
     return None
 
-    # raise NotImplementedError
-
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    count = 0
-    for row in board:
-        if EMPTY in row:
-            count += 1
-
-    if winner(board) != None:
-        return True
-    elif count == 0:
-        return True   
-
-    return False
-
-    # raise NotImplementedError
+    return bitboard.is_terminal(*to_bits(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    state = winner(board)
-    if state == X:
-        return 1
-    elif state == O:
-        return -1
-    else:
-        return 0
-
-    # raise NotImplementedError
+    return bitboard.winner(*to_bits(board))
 
 
 def minimax(board):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board,
+    read from the precomputed perfect-play table.
     """
+    x, o = to_bits(board)
+    if bitboard.is_terminal(x, o):
+        return None
+    cell, _ = book.lookup(x, o)
+    if cell is None:
+        return None
+    return divmod(cell, 3)
+
 
-    if terminal(board) == True:
+def alphabeta(board, on_node=None):
+    """
+    Returns the optimal action for the current player on the board,
+    found by alpha-beta search without a transposition table.
+
+    on_node, if given, is called once for every node searched.
+    """
+    cell, _ = bitboard.alphabeta_move(*to_bits(board), on_node=on_node)
+    if cell is None:
         return None
+    return divmod(cell, 3)
 
-    if player(board) == X:
-        v = -math.inf
-        max_action = set ()
-        for action in actions(board):
-            max = evaluate(result(board, action))
-            max_action.add((max, action))
-            if max == 1:
-                break
-
-        for i in range(0, 3, 1):
-            for max, action in max_action:
-                if max == 1 and i == 1:
-                    return action
-                elif max == 0 and i == 2:
-                    return action
-                elif max == -1 and i == 3:
-                    return action
-            
-
-
-    elif player(board) == O:
-        v = math.inf
-        mini_action = set()
-        for action in actions(board):
-            mini = evaluate(result(board, action))
-            mini_action.add((mini, action))
-            if mini == -1:
-                break
-
-        for i in range(0, 3, 1):
-            for mini, action in mini_action:
-                if mini == -1 and i == 1:
-                    return action
-                elif mini == 0 and i == 2:
-                    return action
-                elif mini == 1 and i == 3:
-                    return action
 
 def evaluate(board):
+    """
+    Returns the minimax value of board, solving each position (up to
+    symmetry) once per process and reusing it from transpositions.
+    """
+    return bitboard.value(*to_bits(board))
+
+
+def canonical_key(board):
+    """
+    Returns the same key for a board and all its rotations and reflections.
+    """
+    return bitboard.canonical(*to_bits(board))
+
+
+def report():
+    """Returns a summary of the search counters."""
+    lookups = search_stats["lookups"]
+    rate = search_stats["hits"] / lookups if lookups else 0.0
+    return (f"{search_stats['nodes']} nodes searched, {lookups} lookups, "
+            f"{search_stats['hits']} hits ({rate:.1%}), "
+            f"{len(transpositions)} positions stored")
 
-    if terminal(board) == True:
-        return utility(board)
 
-    if player(board) == X:
-        v = -math.inf
-        for action in actions(board):
-            v = max(v, evaluate(result(board, action)))
-            if v == 1:
-                break
-        return v
+if __name__ == "__main__":
+    import time
 
-    elif player(board) == O:
-        v = math.inf
-        for action in actions(board):
-            v = min(v, evaluate(result(board, action)))
-            if v == -1:
-                break
-        return v
+    start = time.perf_counter()
+    move = minimax(initial_state())
+    elapsed = time.perf_counter() - start
+    print(f"Table first move {move} in {elapsed * 1000:.1f} ms (with load)")
 
+    start = time.perf_counter()
+    move = divmod(bitboard.best_move(*to_bits(initial_state())), 3)
+    elapsed = time.perf_counter() - start
+    print(f"Memoized first move {move} in {elapsed * 1000:.1f} ms")
+    print(report())
 
+    nodes = [0]
 
+    def count():
+        nodes[0] += 1
 
-    # raise NotImplementedError
+    start = time.perf_counter()
+    move = alphabeta(initial_state(), on_node=count)
+    elapsed = time.perf_counter() - start
+    print(f"Alpha-beta first move {move} in {elapsed * 1000:.1f} ms, "
+          f"{nodes[0]} nodes searched")
@@ -0,0 +1,199 @@
+"""
+Tic Tac Toe tournament
+
+Plays AI-vs-AI and AI-vs-random games without pygame, spread across
+worker processes, checks that no engine ever loses and reports nodes
+searched per move, moves per second and move latency for each engine.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import bitboard
+import book
+import mnk
+import tictactoe as ttt
+
+MODES = ("self", "random")
+
+
+def book_engine(x, o):
+    """Reads the move from the perfect-play table."""
+    cell, _ = book.lookup(x, o)
+    return cell, 0
+
+
+def memo_engine(x, o):
+    """Solves the position with the memoized minimax search."""
+    before = bitboard.search_stats["nodes"]
+    cell = bitboard.best_move(x, o)
+    return cell, bitboard.search_stats["nodes"] - before
+
+
+def alphabeta_engine(x, o):
+    """Searches the position with alpha-beta and no transposition table."""
+    nodes = [0]
+
+    def count():
+        nodes[0] += 1
+
+    cell, _ = bitboard.alphabeta_move(x, o, on_node=count)
+    return cell, nodes[0]
+
+
+def mnk_engine(x, o):
+    """Searches the position with the m,n,k iterative-deepening search."""
+    game = mnk.MNKGame.from_board(ttt.from_bits(x, o))
+    found = mnk.search(game, budget_ms=10000)
+    return found.cell, found.nodes
+
+
+# Each engine maps a position (x, o) to (cell, nodes searched)
+ENGINES = {
+    "book": book_engine,
+    "memo": memo_engine,
+    "alphabeta": alphabeta_engine,
+    "mnk": mnk_engine,
+}
+
+
+def play(engine, mode, ai_is_x, rng):
+    """
+    Plays one game of engine against itself (mode "self") or against
+    uniformly random moves (mode "random"), with the engine as X if
+    ai_is_x. Returns (outcome, latencies, nodes): outcome is 1 if the
+    engine won, -1 if it lost and 0 for a draw, and latencies (seconds)
+    and nodes list one entry per engine move.
+    """
+    game = bitboard.Game()
+    latencies, nodes = [], []
+    while not game.terminal():
+        if mode == "random" and game.x_to_move() != ai_is_x:
+            cell = rng.choice(game.moves())
+        else:
+            start = time.perf_counter()
+            cell, searched = engine(game.x, game.o)
+            latencies.append(time.perf_counter() - start)
+            nodes.append(searched)
+        game.push(cell)
+    outcome = game.winner() if ai_is_x else -game.winner()
+    return outcome, latencies, nodes
+
+
+def _play_games(task):
+    """Worker entry point: plays one batch of games for one engine."""
+    name, mode, games, seed = task
+    rng = random.Random(seed)
+    outcomes = {1: 0, 0: 0, -1: 0}
+    latencies, nodes = [], []
+    for i in range(games):
+        outcome, game_latencies, game_nodes = play(
+            ENGINES[name], mode, i % 2 == 0, rng
+        )
+        outcomes[outcome] += 1
+        latencies.extend(game_latencies)
+        nodes.extend(game_nodes)
+    return name, mode, outcomes, latencies, nodes
+
+
+def tournament(engines, games, workers=None, seed=0, batch=100):
+    """
+    Plays games games per engine and mode, in batches of batch games
+    across forked worker processes. Returns a dict mapping each
+    (engine, mode) to its outcomes, move latencies and nodes per move.
+    """
+    # Load the table before forking so the workers share it
+    if "book" in engines:
+        book.lookup(0, 0)
+
+    tasks = []
+    for name in engines:
+        for mode in MODES:
+            for first in range(0, games, batch):
+                count = min(batch, games - first)
+                tasks.append((name, mode, count, seed + len(tasks)))
+
+    results = {
+        (name, mode): {"outcomes": {1: 0, 0: 0, -1: 0},
+                       "latencies": [], "nodes": []}
+        for name in engines for mode in MODES
+    }
+
+    def merge(done):
+        for name, mode, outcomes, latencies, nodes in done:
+            entry = results[name, mode]
+            for outcome, count in outcomes.items():
+                entry["outcomes"][outcome] += count
+            entry["latencies"].extend(latencies)
+            entry["nodes"].extend(nodes)
+
+    if workers == 1:
+        merge(map(_play_games, tasks))
+    else:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            merge(pool.imap_unordered(_play_games, tasks))
+    return results
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python tournament.py [--games N] [--workers N] "
+              "[--engines book,memo,alphabeta,mnk]"
+    )
+    parser.add_argument("--games", type=int, default=1000,
+                        help="games per engine against itself and random")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="comma-separated engines to play")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engines = [name for name in args.engines.split(",") if name]
+    for name in engines:
+        if name not in ENGINES:
+            parser.error(f"unknown engine {name}")
+
+    start = time.perf_counter()
+    results = tournament(engines, args.games, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+
+    lost = False
+    for (name, mode), entry in results.items():
+        outcomes = entry["outcomes"]
+        latencies = sorted(entry["latencies"])
+        nodes = entry["nodes"]
+        thinking = sum(latencies)
+        rate = len(latencies) / thinking if thinking else 0.0
+        print(f"{name:<9} vs {mode:<6}  won {outcomes[1]:5}  "
+              f"drawn {outcomes[0]:5}  lost {outcomes[-1]:5}")
+        print(f"    {sum(nodes) / max(len(nodes), 1):9.1f} nodes/move  "
+              f"{rate:9.0f} moves/s  "
+              f"p50 {percentile(latencies, 0.5) * 1000:7.3f} ms  "
+              f"p90 {percentile(latencies, 0.9) * 1000:7.3f}  "
+              f"p99 {percentile(latencies, 0.99) * 1000:7.3f}  "
+              f"max {latencies[-1] * 1000 if latencies else 0.0:7.3f}")
+        if outcomes[-1] or (mode == "self" and outcomes[1]):
+            lost = True
+
+    print(f"{len(results) * args.games} games in {elapsed:.2f}s",
+          file=sys.stderr)
+    if lost:
+        print("An engine lost a game.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
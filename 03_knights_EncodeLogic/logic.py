@@ -1,19 +1,99 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    # Sentences are immutable and built through intern, so structurally
+    # equal sentences are one object and compare by identity. Hashes are
+    # computed once; symbol sets and formulas on first use.
+    __slots__ = ("arguments", "_hash", "_symbols", "_formula", "_compiled",
+                 "__weakref__")
+
+    # Every live sentence, keyed by its class and arguments
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, arguments, key=None):
+        """
+        Returns the one sentence of this class with these arguments.
+        key, if given, replaces (cls, arguments) as the intern key.
+        """
+        if key is None:
+            key = (cls, arguments)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            object.__setattr__(sentence, "arguments", arguments)
+            object.__setattr__(sentence, "_hash",
+                               hash((cls.tag,) + arguments))
+            object.__setattr__(sentence, "_symbols", None)
+            object.__setattr__(sentence, "_formula", None)
+            object.__setattr__(sentence, "_compiled", None)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.arguments)
 
     def evaluate(self, model):
-        """Evaluates the logical sentence."""
+        """
+        Evaluates the logical sentence, through a function compiled on
+        first use over its sorted symbols. Models missing a symbol are
+        interpreted instead, so short-circuiting still applies to them.
+        """
+        if self._compiled is None:
+            names = tuple(sorted(self.symbols()))
+            object.__setattr__(self, "_compiled",
+                               (names, self.compile(names)))
+        names, function = self._compiled
+        try:
+            values = tuple([bool(model[name]) for name in names])
+        except KeyError:
+            return self.interpret(model)
+        return function(values)
+
+    def interpret(self, model):
+        """Evaluates the logical sentence by walking the tree."""
         raise Exception("nothing to evaluate")
 
     def formula(self):
         """Returns string formula representing logical sentence."""
+        if self._formula is None:
+            object.__setattr__(self, "_formula", self.write())
+        return self._formula
+
+    def write(self):
+        """Builds the formula string; formula caches it."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset().union(
+                *[argument.symbols() for argument in self.arguments]
+            ))
+        return self._symbols
+
+    def expression(self, compiler):
+        """Returns a Python expression for the sentence in compiled code."""
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols):
+        """
+        Returns a function that evaluates the logical sentence given a
+        tuple of truth values, one for each name in symbols, in order.
+        Equal subformulas are evaluated only once.
+        """
+        return Compiler(symbols).function(self)
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +123,16 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ()
+    tag = "symbol"
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        # 1, 1.0 and True are equal but must stay different symbols
+        return cls.intern((name,), (cls, (name,), type(name)))
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    @property
+    def name(self):
+        return self.arguments[0]
 
     def __repr__(self):
         return self.name
@@ -62,50 +143,60 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
-    def formula(self):
+    interpret = evaluate
+
+    def write(self):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset(self.arguments))
+        return self._symbols
+
+    def expression(self, compiler):
+        try:
+            return f"v[{compiler.positions[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ()
+    tag = "not"
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,))
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    @property
+    def operand(self):
+        return self.arguments[0]
 
     def __repr__(self):
         return f"Not({self.operand})"
 
-    def evaluate(self, model):
-        return not self.operand.evaluate(model)
+    def interpret(self, model):
+        return not self.operand.interpret(model)
 
-    def formula(self):
+    def write(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, compiler):
+        return f"not {compiler.name(self.operand)}"
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ()
+    tag = "and"
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return cls.intern(conjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    @property
+    def conjuncts(self):
+        return self.arguments
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,150 +205,208 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        raise TypeError("sentences are immutable; use "
+                        "knowledge = knowledge.with_conjunct(conjunct)")
+
+    def with_conjunct(self, conjunct):
+        """Returns the conjunction with conjunct added at the end."""
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        return And(*self.conjuncts, conjunct)
 
-    def evaluate(self, model):
-        return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
+    def interpret(self, model):
+        return all(conjunct.interpret(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def write(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def expression(self, compiler):
+        names = [compiler.name(conjunct) for conjunct in self.conjuncts]
+        return " and ".join(names) or "True"
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ()
+    tag = "or"
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.intern(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    @property
+    def disjuncts(self):
+        return self.arguments
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
-    def evaluate(self, model):
-        return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
+    def interpret(self, model):
+        return any(disjunct.interpret(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def write(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, compiler):
+        names = [compiler.name(disjunct) for disjunct in self.disjuncts]
+        return " or ".join(names) or "False"
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ()
+    tag = "implies"
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern((antecedent, consequent))
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    @property
+    def antecedent(self):
+        return self.arguments[0]
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    @property
+    def consequent(self):
+        return self.arguments[1]
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
 
-    def evaluate(self, model):
-        return ((not self.antecedent.evaluate(model))
-                or self.consequent.evaluate(model))
+    def interpret(self, model):
+        return ((not self.antecedent.interpret(model))
+                or self.consequent.interpret(model))
 
-    def formula(self):
+    def write(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, compiler):
+        antecedent = compiler.name(self.antecedent)
+        consequent = compiler.name(self.consequent)
+        return f"not {antecedent} or {consequent}"
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ()
+    tag = "biconditional"
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern((left, right))
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    @property
+    def left(self):
+        return self.arguments[0]
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    @property
+    def right(self):
+        return self.arguments[1]
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
-    def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+    def interpret(self, model):
+        return self.left.interpret(model) == self.right.interpret(model)
 
-    def formula(self):
+    def write(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    def expression(self, compiler):
+        left = compiler.name(self.left)
+        right = compiler.name(self.right)
+        return f"{left} == {right}"
+
+
+class Compiler():
+    """
+    Builds the source of one flat Python function evaluating a sentence,
+    with a local variable per distinct subformula.
+    """
+    def __init__(self, symbols):
+        self.positions = {name: i for i, name in enumerate(symbols)}
+        self.names = {}
+        self.lines = []
+
+    def name(self, sentence):
+        """Returns the local variable holding the value of sentence."""
+        if sentence not in self.names:
+            expression = sentence.expression(self)
+            name = f"t{len(self.names)}"
+            self.lines.append(f"    {name} = {expression}")
+            self.names[sentence] = name
+        return self.names[sentence]
+
+    def function(self, sentence):
+        """Returns the compiled function of a tuple of truth values."""
+        return self.build(self.name(sentence))
+
+    def tuple_function(self, sentences):
+        """
+        Returns a compiled function of a tuple of truth values returning
+        the tuple of the values of sentences.
+        """
+        names = [self.name(sentence) for sentence in sentences]
+        return self.build("(" + "".join(name + ", " for name in names) + ")")
+
+    def build(self, result):
+        source = "\n".join(
+            ["def evaluate(v):"] + self.lines + [f"    return {result}\n"]
+        )
+        namespace = {}
+        exec(compile(source, "<sentence>", "exec"), namespace)
+        return namespace["evaluate"]
+
+
+def model_check(knowledge, query, backend="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    backend "enumerate" checks every model of the symbols, "numpy"
+    checks them in vectorized chunks with truthtable.py, and "sat" asks
+    the clause-learning solver in sat.py whether knowledge ∧ ¬query is
+    unsatisfiable.
+    """
+    return bool(model_check_all(knowledge, [query], backend))
+
+
+def model_check_all(knowledge, queries, backend="enumerate"):
+    """
+    Returns the list of queries entailed by knowledge base, going
+    through the models of knowledge once for all of them. backend is as
+    for model_check; with "sat" clauses learned for one query are kept
+    for the next.
+    """
+    if backend == "sat":
+        import sat
+        return sat.entailed(knowledge, queries)
+    if backend == "numpy":
+        import truthtable
+        return truthtable.entailed(knowledge, queries)
+    if backend != "enumerate":
+        raise ValueError(f"unknown backend {backend}")
+
+    # Get all symbols in knowledge and the queries
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+
+    # Drop each query as soon as a model of knowledge makes it false
+    values = Compiler(symbols).tuple_function([knowledge] + list(queries))
+    remaining = list(range(len(queries)))
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if not remaining:
+            break
+        results = values(model)
+        if results[0]:
+            remaining = [i for i in remaining if results[i + 1]]
+    return [queries[i] for i in remaining]
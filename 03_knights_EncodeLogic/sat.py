@@ -0,0 +1,427 @@
+"""
+SAT backend for logic
+
+Sentences are turned into clauses by the Tseitin encoding, which gives
+every compound subformula its own variable, and solved by a conflict-
+driven clause-learning solver. Variables are positive integers and a
+literal is a variable or its negation.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """A plain clause list, for encoding without solving."""
+    def __init__(self):
+        self.count = 0
+        self.clauses = []
+
+    def new_var(self):
+        self.count += 1
+        return self.count
+
+    def add_clause(self, clause):
+        self.clauses.append(list(clause))
+        return True
+
+
+class Encoder():
+    """
+    Tseitin encoder writing into target, anything with new_var() and
+    add_clause(clause). variables maps symbol names to variables, and
+    equal subformulas share one variable.
+    """
+    def __init__(self, target):
+        self.target = target
+        self.variables = {}
+        self.literals = {}
+        self.constant = None
+
+    def true(self):
+        """Returns a literal forced true."""
+        if self.constant is None:
+            self.constant = self.target.new_var()
+            self.target.add_clause([self.constant])
+        return self.constant
+
+    def symbol(self, name):
+        """Returns the variable of a symbol name, adding it if new."""
+        if name not in self.variables:
+            self.variables[name] = self.target.new_var()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to sentence."""
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.target.add_clause
+        if isinstance(sentence, (And, Or)):
+            parts = sentence.conjuncts if isinstance(sentence, And) \
+                else sentence.disjuncts
+            sign = 1 if isinstance(sentence, And) else -1
+            if not parts:
+                return sign * self.true()
+            literals = [sign * self.literal(part) for part in parts]
+            # For And: v => each part and all parts => v; Or is the dual
+            v = self.target.new_var()
+            for lit in literals:
+                add([-v, lit])
+            add([v] + [-lit for lit in literals])
+            v *= sign
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.target.new_var()
+            add([-v, -a, b])
+            add([v, a])
+            add([v, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.target.new_var()
+            add([-v, -a, b])
+            add([-v, a, -b])
+            add([v, a, b])
+            add([v, -a, -b])
+        else:
+            raise TypeError("must be a logical sentence")
+        self.literals[sentence] = v
+        return v
+
+    def add(self, sentence):
+        """Adds clauses requiring sentence to be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or) and all(
+            isinstance(d, Symbol)
+            or (isinstance(d, Not) and isinstance(d.operand, Symbol))
+            for d in sentence.disjuncts
+        ):
+            self.target.add_clause(
+                [self.literal(d) for d in sentence.disjuncts]
+            )
+        else:
+            self.target.add_clause([self.literal(sentence)])
+
+
+def to_cnf(sentence):
+    """
+    Returns (clauses, variables) for the Tseitin encoding of sentence:
+    clauses satisfiable exactly when sentence is, and the variable of
+    each symbol name.
+    """
+    cnf = CNF()
+    encoder = Encoder(cnf)
+    encoder.add(sentence)
+    return cnf.clauses, encoder.variables
+
+
+def luby(i):
+    """Returns the i-th term (from 0) of the Luby restart sequence."""
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i %= size
+    return 2 ** power
+
+
+class Solver():
+    """
+    A CDCL solver with two watched literals, first-UIP clause learning,
+    activity-ordered decisions, phase saving and Luby restarts.
+
+    Clauses may be added between calls to solve, and learned clauses are
+    kept across calls, so related problems can be solved incrementally
+    through assumptions.
+    """
+    def __init__(self):
+        self.count = 0
+        self.ok = True
+
+        # values[lit] is 1 if lit is true, -1 if false, 0 if unassigned
+        self.values = {}
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.watches = {}
+
+        self.trail = []
+        self.limits = []
+        self.head = 0
+
+        self.heap = []
+        self.increment = 1.0
+        self.learnts = []
+        self.max_learnts = 2000
+        self.model = {}
+        self.stats = {"decisions": 0, "conflicts": 0, "propagations": 0}
+
+    def new_var(self):
+        self.count += 1
+        v = self.count
+        self.values[v] = self.values[-v] = 0
+        self.watches[v] = []
+        self.watches[-v] = []
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        heapq.heappush(self.heap, (0.0, v))
+        return v
+
+    def add_clause(self, clause):
+        """
+        Adds a clause of literals. Returns False if the clauses are now
+        unsatisfiable.
+        """
+        self.backtrack(0)
+        if not self.ok:
+            return False
+        literals = []
+        for lit in clause:
+            value = self.values[lit]
+            if value == 1 or -lit in literals:
+                return True
+            if value == 0 and lit not in literals:
+                literals.append(lit)
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.enqueue(literals[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watches[literals[0]].append(literals)
+            self.watches[literals[1]].append(literals)
+        return self.ok
+
+    def enqueue(self, lit, reason):
+        v = abs(lit)
+        self.values[lit] = 1
+        self.values[-lit] = -1
+        self.level[v] = len(self.limits)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a conflict
+        clause, or None.
+        """
+        values = self.values
+        while self.head < len(self.trail):
+            false_lit = -self.trail[self.head]
+            self.head += 1
+            self.stats["propagations"] += 1
+            watchers = self.watches[false_lit]
+            kept = []
+            for n, clause in enumerate(watchers):
+                # Keep the watched false literal in clause[1]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if values[first] == 1:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if values[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], false_lit
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] == -1:
+                        kept.extend(watchers[n + 1:])
+                        self.watches[false_lit] = kept
+                        return clause
+                    self.enqueue(first, clause)
+            self.watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (learnt, level): the first-UIP clause learned from a
+        conflict, asserting literal first, and the level to jump back to.
+        """
+        current = len(self.limits)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        index = len(self.trail) - 1
+        clause, lit = conflict, None
+        while True:
+            for q in clause if lit is None else clause[1:]:
+                v = abs(q)
+                if v not in seen and self.level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if self.level[v] == current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            clause = self.reason[abs(lit)]
+            pending -= 1
+            if pending == 0:
+                break
+        learnt[0] = -lit
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal with the highest level after the asserting one
+        top = max(range(1, len(learnt)),
+                  key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[top] = learnt[top], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[u], u)
+                         for u in range(1, self.count + 1)
+                         if self.values[u] == 0]
+            heapq.heapify(self.heap)
+        elif self.values[v] == 0:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def reduce(self):
+        """
+        Forgets the longer half of the learned clauses, except binary
+        clauses and those that are the reason for a current assignment.
+        """
+        locked = {id(self.reason[abs(lit)]) for lit in self.trail}
+        self.learnts.sort(key=len)
+        half = len(self.learnts) // 2
+        removed = {id(clause) for clause in self.learnts[half:]
+                   if len(clause) > 2 and id(clause) not in locked}
+        self.learnts = [clause for clause in self.learnts
+                        if id(clause) not in removed]
+        for lit, watchers in self.watches.items():
+            self.watches[lit] = [clause for clause in watchers
+                                 if id(clause) not in removed]
+
+    def backtrack(self, level):
+        """Undoes every assignment above level."""
+        if len(self.limits) <= level:
+            return
+        for lit in self.trail[self.limits[level]:]:
+            v = abs(lit)
+            self.phase[v] = lit > 0
+            self.values[v] = self.values[-v] = 0
+            self.reason[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[self.limits[level]:]
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+    def pick(self):
+        """Returns the next decision literal, or None if all are assigned."""
+        while self.heap:
+            activity, v = heapq.heappop(self.heap)
+            if self.values[v] == 0 and -activity == self.activity[v]:
+                return v if self.phase[v] else -v
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        assumptions true, filling model with a satisfying assignment.
+        """
+        self.backtrack(0)
+        if not self.ok:
+            return False
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restarts = 0
+        budget = 100 * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.stats["conflicts"] += 1
+                if not self.limits:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.watches[learnt[0]].append(learnt)
+                    self.watches[learnt[1]].append(learnt)
+                    self.learnts.append(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.increment /= 0.95
+                budget -= 1
+                if len(self.learnts) - len(self.trail) > self.max_learnts:
+                    self.reduce()
+                    self.max_learnts = int(self.max_learnts * 1.1)
+                continue
+
+            if budget <= 0:
+                restarts += 1
+                budget = 100 * luby(restarts)
+                self.backtrack(0)
+                continue
+
+            decision = None
+            while len(self.limits) < len(assumptions):
+                lit = assumptions[len(self.limits)]
+                if self.values[lit] == -1:
+                    self.backtrack(0)
+                    return False
+                if self.values[lit] == 0:
+                    decision = lit
+                    break
+                # Already true: open an empty level to keep levels aligned
+                self.limits.append(len(self.trail))
+            if decision is None:
+                decision = self.pick()
+                if decision is None:
+                    self.model = {v: self.values[v] == 1
+                                  for v in range(1, self.count + 1)}
+                    return True
+                self.stats["decisions"] += 1
+            self.limits.append(len(self.trail))
+            self.enqueue(decision, None)
+
+
+def entailed(knowledge, queries):
+    """
+    Returns the list of queries entailed by knowledge, that is those for
+    which knowledge and not query together are unsatisfiable.
+
+    One solver holds knowledge for every query, so learned clauses carry
+    over, and each model found rules out every query false in it.
+    """
+    solver = Solver()
+    encoder = Encoder(solver)
+    encoder.add(knowledge)
+    literals = [encoder.literal(query) for query in queries]
+
+    refuted = set()
+    for i, lit in enumerate(literals):
+        if i in refuted:
+            continue
+        if solver.solve([-lit]):
+            refuted.update(j for j, other in enumerate(literals)
+                           if solver.model[abs(other)] != (other > 0))
+    return [query for i, query in enumerate(queries) if i not in refuted]
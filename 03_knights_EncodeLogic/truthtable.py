@@ -0,0 +1,114 @@
+"""
+Vectorized truth tables for logic
+
+Evaluates a Sentence over many models at once with NumPy. Models are
+packed 64 to a word: bit r of word w holds model 64 * w + r, every
+symbol becomes an array of words holding its value in each model, and
+each connective one bitwise array operation. The 2 ** n models are
+walked in chunks of 2 ** CHUNK_BITS so memory stays bounded however
+many symbols there are.
+"""
+
+import numpy as np
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Models per word, and per chunk, as powers of two
+WORD_BITS = 6
+CHUNK_BITS = 22
+
+ALL = np.uint64(2 ** 64 - 1)
+NONE = np.uint64(0)
+
+# PATTERNS[i] is the word of the first WORD_BITS symbols' i-th column
+PATTERNS = tuple(
+    np.uint64(sum(1 << r for r in range(64) if r >> i & 1))
+    for i in range(WORD_BITS)
+)
+
+
+def evaluate(sentence, columns, cache=None):
+    """
+    Returns the packed value of sentence in every model: an array of
+    words, or one word if it does not depend on the arrays. columns maps
+    each symbol name to its packed values; cache, if given, holds the
+    results of subformulas already evaluated on the same columns.
+    """
+    if isinstance(sentence, Symbol):
+        try:
+            return columns[sentence.name]
+        except KeyError:
+            raise Exception(f"variable {sentence.name} not in model")
+    if cache is None:
+        cache = {}
+    if sentence in cache:
+        return cache[sentence]
+
+    if isinstance(sentence, Not):
+        value = np.invert(evaluate(sentence.operand, columns, cache))
+    elif isinstance(sentence, And):
+        value = ALL
+        for conjunct in sentence.conjuncts:
+            value = np.bitwise_and(value, evaluate(conjunct, columns, cache))
+    elif isinstance(sentence, Or):
+        value = NONE
+        for disjunct in sentence.disjuncts:
+            value = np.bitwise_or(value, evaluate(disjunct, columns, cache))
+    elif isinstance(sentence, Implication):
+        value = np.bitwise_or(
+            np.invert(evaluate(sentence.antecedent, columns, cache)),
+            evaluate(sentence.consequent, columns, cache)
+        )
+    elif isinstance(sentence, Biconditional):
+        value = np.invert(np.bitwise_xor(
+            evaluate(sentence.left, columns, cache),
+            evaluate(sentence.right, columns, cache)
+        ))
+    else:
+        raise TypeError("must be a logical sentence")
+    cache[sentence] = value
+    return value
+
+
+def chunks(symbols):
+    """
+    Yields a dict of packed columns per chunk of the models of symbols,
+    a list of names. The first CHUNK_BITS symbols vary within a chunk
+    and the rest are fixed per chunk. With fewer than WORD_BITS symbols
+    each word repeats the same models.
+    """
+    packed = symbols[:WORD_BITS]
+    low = symbols[WORD_BITS:CHUNK_BITS]
+    high = symbols[CHUNK_BITS:]
+    words = np.arange(2 ** len(low), dtype=np.uint64)
+    varying = {name: PATTERNS[i] for i, name in enumerate(packed)}
+    for i, name in enumerate(low):
+        varying[name] = (words >> np.uint64(i) & np.uint64(1)) * ALL
+    for chunk in range(2 ** len(high)):
+        columns = dict(varying)
+        for i, name in enumerate(high):
+            columns[name] = ALL if chunk >> i & 1 else NONE
+        yield columns
+
+
+def entailed(knowledge, queries):
+    """
+    Returns the list of queries that hold in every model of the symbols
+    in which knowledge holds, evaluating knowledge once per chunk.
+    """
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    remaining = list(range(len(queries)))
+    for columns in chunks(symbols):
+        if not remaining:
+            break
+        cache = {}
+        holds = evaluate(knowledge, columns, cache)
+        remaining = [
+            i for i in remaining
+            if not np.any(np.bitwise_and(
+                holds, np.invert(evaluate(queries[i], columns, cache))
+            ))
+        ]
+    return [queries[i] for i in remaining]